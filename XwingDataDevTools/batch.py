@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.normalize import script
+from XwingDataDevTools.normalize.base import XWingDataBaseMixin
+from XwingDataDevTools.schema_builder import origin, upstream
+
+schema_builders = OrderedDict([
+    ('upstream', upstream),
+    ('origin', origin),
+])
+
+
+def parse_checkout(argument, default_schema):
+    """`path` or `path:schema`, where schema names the schema builders to run, or is `none`."""
+    path, _, schema = argument.rpartition(':')
+    if not path or schema not in list(schema_builders) + ['none']:
+        path, schema = argument, default_schema
+    return os.path.abspath(path), None if schema == 'none' else schema
+
+
+def run_checkout(checkout, schema, log_path, order_fields=False, incremental=False,
+                 dry_run=False, trace_memory=False):
+    """
+    Normalizes the data files of an xwing-data checkout and builds its schemas.
+
+    Everything the tools print goes to the log file. Schemas are not built in dry runs, as
+    schema builders have no such mode and would write them anyway.
+
+    Schema builders describe fields as they were named before FieldRenamer, ei. `faction` rather
+    than `factions`, so fields are only renamed in checkouts that build no schemas.
+    """
+    report = instrumentation.new_report(trace_memory)
+    data_root = os.path.join(checkout, 'data')
+    error = None
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            script.run(
+                data_root, order_fields, incremental, dry_run, jobs=1, rename_fields=not schema
+            )
+            if schema and not dry_run:
+                schema_root = os.path.join(checkout, 'schemas')
+                os.makedirs(schema_root, exist_ok=True)
+                schema_builders[schema].build(data_root, schema_root)
+        except Exception:
+            error = traceback.format_exc()
+            print(error)
+    return OrderedDict(
+        [('checkout', checkout), ('schema', schema), ('log', log_path), ('error', error)] +
+        list(report.to_dict().items())
+    )
+
+
+def main(argv=None):
+    reports_root = os.path.join(XWingDataBaseMixin.cache_root, 'reports')
+
+    parser = argparse.ArgumentParser(
+        description='Normalizes and builds the schemas of several xwing-data checkouts at once.'
+    )
+    parser.add_argument('checkouts', nargs='+', metavar='CHECKOUT[:SCHEMA]',
+                        help='Checkout paths, optionally followed by the schema builders to use '
+                             '({} or none).'.format(', '.join(schema_builders)))
+    parser.add_argument('--schema', default='upstream', choices=list(schema_builders) + ['none'],
+                        help='Schema builders for checkouts that do not name theirs.')
+    parser.add_argument('--order-fields', action='store_true')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--jobs', type=int, help='Checkouts processed at once.')
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--report', default=os.path.join(reports_root, 'batch.json'))
+    args = parser.parse_args(argv)
+
+    checkouts = [parse_checkout(argument, args.schema) for argument in args.checkouts]
+    logs_root = os.path.join(os.path.dirname(os.path.abspath(args.report)), 'batch')
+    os.makedirs(logs_root, exist_ok=True)
+
+    start = time.perf_counter()
+    jobs = args.jobs or min(len(checkouts), os.cpu_count() or 1)
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(
+                run_checkout, checkout, schema,
+                os.path.join(logs_root, '{}-{}.log'.format(i, os.path.basename(checkout))),
+                args.order_fields, args.incremental, args.dry_run, args.trace_memory
+            )
+            for i, (checkout, schema) in enumerate(checkouts)
+        ]
+        results = [future.result() for future in futures]
+
+    report = OrderedDict([
+        ('elapsed', time.perf_counter() - start),
+        ('wall_time', sum([r['wall_time'] for r in results])),
+        ('bytes_read', sum([r['bytes_read'] for r in results])),
+        ('bytes_written', sum([r['bytes_written'] for r in results])),
+        ('errors', [r['checkout'] for r in results if r['error']]),
+        ('checkouts', results),
+    ])
+    with open(args.report, 'w') as file_object:
+        json.dump(report, file_object, indent=2)
+
+    print('{:<60} {:>10} {}'.format('checkout', 'seconds', 'log'))
+    for r in results:
+        print('{:<60} {:>10.4f} {}{}'.format(
+            r['checkout'], r['wall_time'], r['log'], ' FAILED' if r['error'] else ''
+        ))
+    print('\nReport saved to {}'.format(args.report))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+import os
+import json
+import random
+import datetime
+from collections import OrderedDict
+
+# Roughly how many records the real xwing-data files hold, scale 1 mimics them.
+real_sizes = {
+    'ships': 52,
+    'pilots': 290,
+    'upgrades': 320,
+    'sources': 60,
+    'conditions': 12,
+    'damage-deck-core': 14,
+    'damage-deck-core-tfa': 14,
+    'reference-cards': 10,
+}
+
+factions = ['Rebel Alliance', 'Resistance', 'Galactic Empire', 'First Order', 'Scum and Villainy']
+actions = ['Focus', 'Target Lock', 'Evade', 'Barrel Roll', 'Boost', 'Cloak', 'SLAM']
+slots = ['Elite', 'Torpedo', 'Astromech', 'Crew', 'Cannon', 'Bomb', 'System', 'Modification']
+icons = ['[Focus]', '[Evade]', '[Target Lock]', '[Barrel Roll]', '[Hit]', '[Critical Hit]']
+texts = [
+    'When attacking, you may change 1 of your [Focus] results to a [Hit] result.',
+    '<strong>Action:</strong> Assign 1 focus token to your ship.<br /><br />Then roll 1 die.',
+    'Perform a <em>free</em> action. <b>Limited.</b>',
+    'After you execute a maneuver, you may perform a free [Evade] action.',
+    '<i>Attack (focus):</i> Spend this card to perform this attack.',
+]
+
+
+class FixtureGenerator:
+    """
+    Builds a synthetic, internally consistent xwing-data dataset of any size.
+
+    Records look like the raw upstream data: foreign keys are names or `{id: amount}` mappings,
+    maneuvers are ragged and some fields are missing, so every normalizer has work to do.
+    """
+
+    def __init__(self, scale=1, seed=0, reference_cards=False):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.reference_cards = reference_cards
+        self.sizes = {key: max(1, int(size * scale)) for key, size in real_sizes.items()}
+
+    def pick(self, population, k=None):
+        if k is None:
+            return self.random.choice(population)
+        return self.random.sample(population, min(k, len(population)))
+
+    def text(self):
+        return ' '.join(self.pick(texts, self.random.randint(1, 3)))
+
+    def maneuvers(self, speeds, width):
+        return [
+            [self.random.choice([0, 0, 1, 1, 2, 3]) for _ in range(self.random.randint(3, width))]
+            for _ in range(speeds)
+        ]
+
+    def ships(self):
+        ships = []
+        for i in range(self.sizes['ships']):
+            size = self.random.choice(['small', 'small', 'small', 'large', 'large', 'huge'])
+            ship = OrderedDict([
+                ('id', i),
+                ('name', 'Ship {}'.format(i)),
+                ('xws', 'ship{}'.format(i)),
+                ('size', size),
+                ('faction', self.pick(factions, self.random.randint(1, 2))),
+            ])
+            if size == 'huge':
+                ship['energy'] = self.random.randint(2, 5)
+                ship['epic_points'] = self.random.randint(1, 3)
+            else:
+                ship['attack'] = self.random.randint(1, 4)
+            ship['agility'] = self.random.randint(0, 3)
+            ship['hull'] = self.random.randint(2, 12)
+            ship['shields'] = self.random.randint(0, 6)
+            ship['actions'] = self.pick(actions, self.random.randint(1, 4))
+            if size == 'huge':
+                ship['maneuvers'] = self.maneuvers(self.random.randint(2, 5), 5)
+                ship['maneuvers_energy'] = self.maneuvers(len(ship['maneuvers']), 5)
+            else:
+                ship['maneuvers'] = self.maneuvers(self.random.randint(3, 6), 13)
+            ships.append(ship)
+        return ships
+
+    def conditions(self):
+        return [
+            OrderedDict([
+                ('id', i),
+                ('name', 'Condition {}'.format(i)),
+                ('xws', 'condition{}'.format(i)),
+                ('unique', self.random.random() < 0.5),
+                ('image', 'conditions/condition-{}.png'.format(i)),
+                ('text', self.text()),
+            ])
+            for i in range(self.sizes['conditions'])
+        ]
+
+    def pilots(self, ships, conditions):
+        pilots = []
+        for i in range(self.sizes['pilots']):
+            ship = self.pick(ships)
+            pilot = OrderedDict([
+                ('id', i),
+                # Some pilots share their name across factions, like the real ones do.
+                ('name', 'Pilot {}'.format(i - 1 if i % 10 == 1 else i)),
+                ('unique', self.random.random() < 0.6),
+                ('ship', ship['name']),
+                ('skill', self.random.randint(1, 9)),
+                ('points', self.random.randint(12, 60)),
+                ('slots', self.pick(slots, self.random.randint(0, 4))),
+                ('text', self.text()),
+                ('image', 'pilots/pilot-{}.png'.format(i)),
+                ('faction', self.pick(ship['faction'])),
+                ('xws', 'pilot{}'.format(i)),
+            ])
+            if self.random.random() < 0.05:
+                pilot['conditions'] = [self.pick(conditions)['name']]
+            if self.random.random() < 0.05:
+                pilot['ship_override'] = OrderedDict([
+                    ('attack', self.random.randint(1, 4)),
+                    ('agility', self.random.randint(0, 3)),
+                    ('hull', self.random.randint(2, 12)),
+                    ('shields', self.random.randint(0, 6)),
+                ])
+            pilots.append(pilot)
+        return pilots
+
+    def upgrades(self, ships, conditions):
+        upgrades = []
+        for i in range(self.sizes['upgrades']):
+            upgrade = OrderedDict([
+                ('id', i),
+                ('name', 'Upgrade {}'.format(i)),
+                ('slot', self.pick(slots)),
+                ('points', self.random.randint(0, 8)),
+                ('text', self.text()),
+                ('image', 'upgrades/upgrade-{}.png'.format(i)),
+                ('xws', 'upgrade{}'.format(i)),
+            ])
+            if self.random.random() < 0.2:
+                upgrade['unique'] = True
+            if self.random.random() < 0.1:
+                upgrade['limited'] = True
+            if self.random.random() < 0.15:
+                upgrade['faction'] = self.pick(factions)
+            if self.random.random() < 0.1:
+                upgrade['ship'] = [ship['name'] for ship in self.pick(ships, 2)]
+            if self.random.random() < 0.1:
+                upgrade['size'] = self.pick(['huge', 'large', 'small'], 2)
+            if upgrade['slot'] in ('Torpedo', 'Cannon'):
+                upgrade['attack'] = self.random.randint(2, 5)
+                upgrade['range'] = self.pick(['1', '1-2', '2-3', '1-3'])
+            if self.random.random() < 0.05:
+                upgrade['energy'] = self.random.randint(1, 4)
+            if upgrade['slot'] == 'Bomb':
+                upgrade['effect'] = self.text()
+            if self.random.random() < 0.05:
+                upgrade['grants'] = [
+                    OrderedDict([('type', 'action'), ('name', self.pick(actions))]),
+                    OrderedDict([('type', 'slot'), ('name', self.pick(slots))]),
+                ]
+            if self.random.random() < 0.03:
+                upgrade['conditions'] = [self.pick(conditions)['name']]
+            upgrades.append(upgrade)
+        return upgrades
+
+    def contents(self, models, k):
+        return OrderedDict(
+            (str(model['id']), self.random.randint(1, 2)) for model in self.pick(models, k)
+        )
+
+    def sources(self, ships, pilots, upgrades, conditions, reference_cards):
+        sources = []
+        first_day = datetime.date(2012, 1, 1)
+        for i in range(self.sizes['sources']):
+            announced = first_day + datetime.timedelta(days=self.random.randint(0, 1800))
+            released = announced + datetime.timedelta(days=self.random.randint(30, 300))
+            contents = OrderedDict([
+                ('ships', self.contents(ships, self.random.randint(1, 3))),
+                ('pilots', self.contents(pilots, self.random.randint(2, 8))),
+                ('upgrades', self.contents(upgrades, self.random.randint(2, 10))),
+            ])
+            if self.random.random() < 0.1:
+                contents['conditions'] = self.contents(conditions, 1)
+            if reference_cards and self.random.random() < 0.2:
+                contents['reference-cards'] = [card['id'] for card in self.pick(reference_cards, 2)]
+            sources.append(OrderedDict([
+                ('id', i),
+                ('sku', 'SWX{:02d}'.format(i)),
+                ('name', 'Source {}'.format(i)),
+                ('wave', self.random.randint(0, 11)),
+                ('image', 'sources/source-{}.png'.format(i)),
+                ('thumb', 'sources/thumbs/source-{}.png'.format(i)),
+                ('contents', contents),
+                ('released', released < datetime.date(2017, 1, 1)),
+                ('release_date', released.isoformat()),
+                ('announcement_date', announced.isoformat()),
+            ]))
+        return sources
+
+    def damage_deck(self, source_key):
+        return [
+            OrderedDict([
+                ('name', 'Damage {}'.format(i)),
+                ('type', self.pick(['Pilot', 'Ship'])),
+                ('amount', self.random.randint(1, 2)),
+                ('text', self.text()),
+            ])
+            for i in range(self.sizes[source_key])
+        ]
+
+    def reference_cards_data(self):
+        return [
+            OrderedDict([
+                ('id', i),
+                ('title', 'Reference {}'.format(i)),
+                ('subtitle', 'Subtitle {}'.format(i)),
+                ('image', 'reference-cards/reference-{}.png'.format(i)),
+                ('text', self.text()),
+            ])
+            for i in range(self.sizes['reference-cards'])
+        ]
+
+    def generate(self):
+        ships = self.ships()
+        conditions = self.conditions()
+        pilots = self.pilots(ships, conditions)
+        upgrades = self.upgrades(ships, conditions)
+        reference_cards = self.reference_cards_data()
+        return OrderedDict([
+            ('ships', ships),
+            ('conditions', conditions),
+            ('pilots', pilots),
+            ('upgrades', upgrades),
+            ('sources', self.sources(
+                ships, pilots, upgrades, conditions, self.reference_cards and reference_cards
+            )),
+            ('damage-deck-core', self.damage_deck('damage-deck-core')),
+            ('damage-deck-core-tfa', self.damage_deck('damage-deck-core-tfa')),
+            ('reference-cards', reference_cards),
+        ])
+
+    def write(self, root):
+        os.makedirs(root, exist_ok=True)
+        for source_key, data in self.generate().items():
+            with open('{}/{}.js'.format(root, source_key), 'w') as file_object:
+                json.dump(data, file_object, indent=2, ensure_ascii=False)
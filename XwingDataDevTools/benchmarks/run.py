@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import contextlib
+from collections import OrderedDict
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.benchmarks.fixtures import FixtureGenerator
+from XwingDataDevTools.normalize import ids, rename, script, trivial
+from XwingDataDevTools.normalize.base import (
+    DataSession, SingleDataCollector, XWingDataBaseMixin
+)
+from XwingDataDevTools.normalize.scheduler import Scheduler
+from XwingDataDevTools.schema_builder import origin, upstream
+from XwingDataDevTools.schema_builder.base import XWingSchemaBuilder
+
+# Tools that are not part of the normalize script but still worth keeping an eye on.
+extra_tools = [
+    ids.RefreshIdsUsingNames,
+    trivial.RangeToString,
+    trivial.AttackToInt,
+    trivial.EnergyToInt,
+    trivial.IconList,
+    trivial.ShipNames,
+    trivial.ShipsByReleaseDate,
+]
+
+
+def result(group, measurement, error=None):
+    wall_time = measurement.wall_time
+    return OrderedDict([
+        ('group', group),
+        ('name', measurement.name),
+        ('wall_time', wall_time),
+        ('records_per_second', measurement.records / wall_time if wall_time else None),
+        ('bytes_per_second', (
+            (measurement.bytes_read + measurement.bytes_written) / wall_time if wall_time else None
+        )),
+        ('memory_saved', measurement.memory_saved),
+        ('peak_memory', measurement.peak_memory),
+        ('error', error),
+    ])
+
+
+def unattended(tools):
+    """Tools that never stop to ask, collectors prompt for every field they find missing."""
+    return [tool for tool in tools if not issubclass(tool, SingleDataCollector)]
+
+
+@contextlib.contextmanager
+def without_snapshots():
+    """
+    Files are parsed every time they're loaded, so timings don't depend on what the snapshot
+    cache holds and no snapshot of the temporary datasets is left behind.
+    """
+    session, builder = DataSession.use_snapshots, XWingSchemaBuilder.use_snapshots
+    DataSession.use_snapshots = XWingSchemaBuilder.use_snapshots = False
+    try:
+        yield
+    finally:
+        DataSession.use_snapshots, XWingSchemaBuilder.use_snapshots = session, builder
+
+
+def benchmark_normalizers(root):
+    results = []
+    for tool in unattended(script.steps(order_fields=True) + extra_tools):
+        session = DataSession(root)
+        error = None
+        try:
+            tool(session).run()
+            with instrumentation.report.measurements[-1].stage('save'):
+                session.save()
+        except Exception as e:
+            error = repr(e)
+        results.append(result('normalize', instrumentation.report.measurements[-1], error))
+    return results
+
+
+def benchmark_schema_builders(module, data_root, schema_root):
+    results = []
+    group = module.__name__.split('.')[-1]
+    shared_definitions = module.SharedDefinitionsBuilder(data_root, schema_root)
+    for builder in module.builders:
+        error = None
+        try:
+            builder(shared_definitions, data_root, schema_root)
+        except Exception as e:
+            error = repr(e)
+        results.append(result(group, instrumentation.report.measurements[-1], error))
+    with shared_definitions.measurement.stage('save'):
+        shared_definitions.save_schema()
+    results.append(result(group, shared_definitions.measurement))
+    return results
+
+
+def benchmark(scale, trace_memory=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        normalize_root = os.path.join(tmp, 'normalize')
+        upstream_root = os.path.join(tmp, 'upstream')
+        origin_root = os.path.join(tmp, 'origin')
+        schema_root = os.path.join(tmp, 'schemas')
+        os.makedirs(os.path.join(schema_root, 'upstream'))
+        os.makedirs(os.path.join(schema_root, 'origin'))
+
+        FixtureGenerator(scale).write(normalize_root)
+        FixtureGenerator(scale, reference_cards=True).write(upstream_root)
+        FixtureGenerator(scale, reference_cards=True).write(origin_root)
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+                without_snapshots():
+            # Origin builders expect the data normalized, foreign keys and all, but with fields
+            # named as they were before renaming. It's done before measuring anything.
+            origin_steps = unattended(
+                [tool for tool in script.steps() if tool is not rename.FieldRenamer]
+            )
+            Scheduler(DataSession(origin_root), jobs=1).run(origin_steps)
+
+            instrumentation.new_report(trace_memory)
+            results = benchmark_normalizers(normalize_root)
+            results.extend(benchmark_schema_builders(
+                upstream, upstream_root, os.path.join(schema_root, 'upstream')
+            ))
+            results.extend(benchmark_schema_builders(
+                origin, origin_root, os.path.join(schema_root, 'origin')
+            ))
+
+    for r in results:
+        r['scale'] = scale
+    return results
+
+
+def key(r):
+    return '{}x/{}/{}'.format(r['scale'], r['group'], r['name'])
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print('{:<60} {:>10} {:>10} {:>8}'.format('benchmark', 'seconds', 'baseline', 'ratio'))
+    for r in results:
+        if r['error']:
+            # The time of a partial run means nothing, failures are never compared.
+            print('{:<60} {:>10} {:>10} {:>8} FAILED {}'.format(key(r), '-', '-', '-', r['error']))
+            continue
+        before = baseline.get(key(r), {}).get('wall_time')
+        ratio = r['wall_time'] / before if before else None
+        print('{:<60} {:>10.4f} {:>10} {:>8}'.format(
+            key(r),
+            r['wall_time'],
+            '{:.4f}'.format(before) if before else '-',
+            '{:.2f}'.format(ratio) if ratio else '-',
+        ))
+        if ratio and ratio > 1 + threshold:
+            regressions.append(key(r))
+    return regressions
+
+
+def main(argv=None):
+    default_baseline = os.path.join(XWingDataBaseMixin.cache_root, 'benchmarks', 'baseline.json')
+
+    parser = argparse.ArgumentParser(description='Benchmarks normalizers and schema builders.')
+    parser.add_argument('--scale', type=float, nargs='+', default=[1, 10],
+                        help='Dataset sizes, as multiples of the real data.')
+    parser.add_argument('--baseline', default=default_baseline)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Slowdown over the baseline tolerated before failing.')
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--output', help='Where to save the results as JSON.')
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scale:
+        results.extend(benchmark(scale, args.trace_memory))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file_object:
+            baseline = json.load(file_object)
+
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.output:
+        with open(args.output, 'w') as file_object:
+            json.dump(results, file_object, indent=2)
+
+    failures = [key(r) for r in results if r['error']]
+
+    if args.save_baseline:
+        baseline.update((key(r), r) for r in results if not r['error'])
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as file_object:
+            json.dump(baseline, file_object, indent=2, sort_keys=True)
+        print('\nBaseline saved to {}'.format(args.baseline))
+
+    if failures:
+        print('\nFailed: {}'.format(', '.join(failures)))
+    if regressions:
+        print('\nRegressions over {:.0%}: {}'.format(args.threshold, ', '.join(regressions)))
+    return 1 if failures or regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
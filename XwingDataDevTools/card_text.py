@@ -0,0 +1,34 @@
+"""
+Helpers for the text printed on cards, as found in the text and effect fields of the data.
+"""
+import re
+from functools import lru_cache
+
+markdown_tags = {
+    'strong': '**',
+    'b': '**',
+    'em': '*',
+    'i': '*',
+    'br': '\n',
+}
+
+# Opening, closing or self closing, in any case and with or without attributes.
+markdown_tag_pattern = re.compile(
+    r'<\s*/?\s*({})\b[^>]*>'.format('|'.join(markdown_tags)), re.IGNORECASE
+)
+
+
+def markdown_tag(match):
+    return markdown_tags[match.group(1).lower()]
+
+
+@lru_cache(maxsize=8192)
+def html_to_markdown(text):
+    """
+    Turns the bold, italic and line break tags of a card text into markdown, in a single pass.
+
+    Results are memoized, as plenty of cards share the very same text.
+    """
+    if '<' not in text:
+        return text
+    return markdown_tag_pattern.sub(markdown_tag, text)
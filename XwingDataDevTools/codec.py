@@ -0,0 +1,72 @@
+"""
+JSON encoding and decoding for every data and schema file.
+
+Documents are decoded into plain dicts, which keep the key order of the file just like
+OrderedDict did, for a fraction of the cost. Decoding uses orjson when it's installed, falling
+back to the json module for anything orjson refuses (ei. NaN or integers over 64 bits).
+Encoding always goes through the json module, so the output is byte for byte what it has always
+been.
+"""
+import sys
+import json
+import hashlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+backends = ['orjson', 'json'] if orjson is not None else ['json']
+backend = backends[0]
+
+
+def use_backend(name):
+    global backend
+    if name not in backends:
+        raise ValueError('JSON backend {!r} is not available, use one of {}'.format(name, backends))
+    backend = name
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def loads(content):
+    if backend == 'orjson':
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content)
+
+
+def load(path):
+    with open(path, 'r') as file_object:
+        return loads(file_object.read())
+
+
+def intern_strings(data):
+    """
+    Swaps every string value in data, at any depth, for its interned copy, so identical strings
+    across records and collections share one object. Returns the bytes of the copies let go.
+
+    Keys are left as they are, parsers already share them within a document.
+    """
+    saved = 0
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        if type(value) is str:
+            interned = sys.intern(value)
+            if interned is not value:
+                saved += sys.getsizeof(value)
+                data[key] = interned
+        elif isinstance(value, (dict, list)):
+            saved += intern_strings(value)
+    return saved
+
+
+def dumps(data, layout=None, ensure_ascii=False):
+    """Encodes data indented by 2 spaces, or as the given custom_indentation.Layout says."""
+    if layout is not None:
+        return layout.encode(data)
+    return json.dumps(data, indent=2, ensure_ascii=ensure_ascii)
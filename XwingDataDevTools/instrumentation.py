@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import threading
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Measurements whose stages are running, innermost last. Counters go to the innermost one.
+active = []
+# Counters are also bumped from I/O threads.
+count_lock = threading.Lock()
+
+
+class Measurement:
+    """
+    What a single tool cost: wall time per stage, bytes read and written, records handled, bytes
+    freed by interning loaded strings and, when tracing memory, the peak of traced memory during
+    any of its stages.
+    """
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.stages = OrderedDict()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.records = 0
+        self.memory_saved = 0
+        self.peak_memory = None
+
+    @contextmanager
+    def stage(self, stage):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        active.append(self)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0) + time.perf_counter() - start
+            active.remove(self)
+            if tracing:
+                self.peak_memory = max(self.peak_memory or 0, tracemalloc.get_traced_memory()[1])
+
+    @property
+    def wall_time(self):
+        return sum(self.stages.values())
+
+    def to_dict(self):
+        return OrderedDict([
+            ('name', self.name),
+            ('kind', self.kind),
+            ('wall_time', self.wall_time),
+            ('stages', self.stages),
+            ('bytes_read', self.bytes_read),
+            ('bytes_written', self.bytes_written),
+            ('records', self.records),
+            ('memory_saved', self.memory_saved),
+            ('peak_memory', self.peak_memory),
+        ])
+
+    @classmethod
+    def from_dict(cls, data):
+        measurement = cls(data['name'], data['kind'])
+        measurement.stages = OrderedDict(data['stages'])
+        for attr in ['bytes_read', 'bytes_written', 'records', 'memory_saved', 'peak_memory']:
+            setattr(measurement, attr, data[attr])
+        return measurement
+
+
+class Report:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.measurements = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name, kind):
+        measurement = Measurement(name, kind)
+        self.measurements.append(measurement)
+        return measurement
+
+    def to_dict(self):
+        totals = OrderedDict()
+        for measurement in self.measurements:
+            for stage, seconds in measurement.stages.items():
+                totals[stage] = totals.get(stage, 0) + seconds
+        return OrderedDict([
+            ('wall_time', sum(totals.values())),
+            ('stages', totals),
+            ('bytes_read', sum([m.bytes_read for m in self.measurements])),
+            ('bytes_written', sum([m.bytes_written for m in self.measurements])),
+            ('memory_saved', sum([m.memory_saved for m in self.measurements])),
+            ('measurements', [m.to_dict() for m in self.measurements]),
+        ])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as file_object:
+            json.dump(self.to_dict(), file_object, indent=2)
+        memory_saved = sum([m.memory_saved for m in self.measurements])
+        if memory_saved:
+            print('\nInterning loaded strings saved {:.1f} MB'.format(memory_saved / 2**20))
+        print('\nReport saved to {}'.format(path))
+
+
+report = Report()
+
+
+def new_report(trace_memory=False):
+    global report
+    report = Report(trace_memory)
+    return report
+
+
+def count(attr, amount):
+    with count_lock:
+        if active:
+            measurement = active[-1]
+            setattr(measurement, attr, getattr(measurement, attr) + amount)
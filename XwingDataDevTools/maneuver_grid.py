@@ -0,0 +1,144 @@
+"""
+Ship dials held as compact grids of colours rather than lists of lists of ints.
+
+A dial is a grid with a row per speed and a column per maneuver, each cell holding the colour of
+that maneuver at that speed: 0 when unavailable, 1 for white, 2 for green and 3 for red. Cells
+are kept as a uint8 matrix, a NumPy array when it's installed or plain bytes otherwise, so
+looking over the dials of plenty of ships takes a few array operations instead of a loop per
+cell.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ManeuverGrid:
+    """
+    The maneuvers of a ship at every speed, as found under `maneuvers` or `maneuvers_energy`.
+
+    Rows in the data don't need to be as long as each other, the length of every row is kept
+    and cells past it are left at 0, so a grid turns back into the very same lists it was made
+    from.
+    """
+
+    def __init__(self, cells, lengths, width):
+        self.cells = cells
+        self.lengths = lengths
+        self.width = width
+
+    @classmethod
+    def from_json(cls, rows):
+        lengths = [len(row) for row in rows]
+        width = max(lengths, default=0)
+        cells = bytearray(len(rows) * width)
+        for index, row in enumerate(rows):
+            cells[index * width:index * width + len(row)] = row
+        return cls.from_bytes(cells, lengths, width)
+
+    @classmethod
+    def from_bytes(cls, cells, lengths, width):
+        if numpy is not None:
+            cells = numpy.frombuffer(cells, dtype=numpy.uint8).reshape(len(lengths), width)
+        else:
+            cells = bytes(cells)
+        return cls(cells, list(lengths), width)
+
+    @classmethod
+    def stack(cls, grids):
+        """Every row of the grids given in a single grid, to look over all of them at once."""
+        grids = list(grids)
+        width = max([grid.width for grid in grids], default=0)
+        lengths = [length for grid in grids for length in grid.lengths]
+        if numpy is not None:
+            cells = numpy.zeros((len(lengths), width), dtype=numpy.uint8)
+            start = 0
+            for grid in grids:
+                cells[start:start + grid.speeds, :grid.width] = grid.cells
+                start += grid.speeds
+            return cls(cells, lengths, width)
+        cells = bytearray()
+        for grid in grids:
+            for index in range(grid.speeds):
+                cells += grid.row(index).ljust(width, b'\0')
+        return cls(bytes(cells), lengths, width)
+
+    def to_json(self):
+        rows = []
+        for index, length in enumerate(self.lengths):
+            row = self.row(index)[:length]
+            rows.append(row.tolist() if numpy is not None else list(row))
+        return rows
+
+    @property
+    def speeds(self):
+        """Rows in the grid, available maneuvers or not."""
+        return len(self.lengths)
+
+    def row(self, index):
+        if numpy is not None:
+            return self.cells[index]
+        return self.cells[index * self.width:(index + 1) * self.width]
+
+    def row_widths(self):
+        """Columns up to the last available maneuver of every row, 0 for rows without any."""
+        if not self.width:
+            return [0] * self.speeds
+        if numpy is not None:
+            available = self.cells != 0
+            return numpy.where(
+                available.any(axis=1), self.width - available[:, ::-1].argmax(axis=1), 0
+            ).tolist()
+        return [len(self.row(index).rstrip(b'\0')) for index in range(self.speeds)]
+
+    @property
+    def max_speed(self):
+        """Rows up to the last one with an available maneuver, the speed the ship can reach."""
+        if numpy is not None:
+            speeds = numpy.flatnonzero(self.cells.any(axis=1))
+            return int(speeds[-1]) + 1 if len(speeds) else 0
+        for index in range(self.speeds - 1, -1, -1):
+            if self.row(index).strip(b'\0'):
+                return index + 1
+        return 0
+
+    @property
+    def maneuver_width(self):
+        """Columns up to the last available maneuver at any speed."""
+        if numpy is not None:
+            columns = numpy.flatnonzero(self.cells.any(axis=0))
+            return int(columns[-1]) + 1 if len(columns) else 0
+        return max(self.row_widths(), default=0)
+
+    def colour_counts(self):
+        """How many cells hold each colour, only those found in the rows as given count."""
+        if numpy is not None:
+            counts = numpy.bincount(self.cells.ravel(), minlength=1).tolist()
+        else:
+            counts = [0] * (max(self.cells, default=0) + 1)
+            for colour in set(self.cells):
+                counts[colour] = self.cells.count(colour)
+        # Cells past the end of their row are padding, not unavailable maneuvers.
+        counts[0] -= self.speeds * self.width - sum(self.lengths)
+        return {colour: count for colour, count in enumerate(counts) if count}
+
+    def fit(self, speeds, width, cut_from=None):
+        """
+        A grid with at least `speeds` rows, added ones having no maneuvers available. Rows of up
+        to `cut_from` columns, all of them unless told otherwise, are padded or cut down to
+        `width` columns while longer ones are only cut down to it.
+        """
+        cut_from = width if cut_from is None else cut_from
+        lengths = [
+            width if length <= cut_from else min(length, width) for length in self.lengths
+        ]
+        lengths.extend([width] * (speeds - self.speeds))
+        columns = min(width, self.width)
+        if numpy is not None:
+            cells = numpy.zeros((len(lengths), width), dtype=numpy.uint8)
+            cells[:self.speeds, :columns] = self.cells[:, :columns]
+            return ManeuverGrid(cells, lengths, width)
+        cells = bytearray(len(lengths) * width)
+        for index in range(self.speeds):
+            cells[index * width:index * width + columns] = self.row(index)[:columns]
+        return ManeuverGrid(bytes(cells), lengths, width)
@@ -0,0 +1,207 @@
+"""
+Which ships can perform which maneuvers, answered for every ship at once.
+
+For every maneuver at every speed the index holds a bitmask of the ships having it in each
+colour, bit `i` standing for the i-th ship in ships.js. Energy dials of huge ships are held the
+same way, one bitmask per amount of energy. Questions like "ships with a green 2 bank" or
+"ships with every maneuver of this dial" come down to a few lookups and bitwise operations over
+those masks, whatever the number of ships.
+
+    index = ManeuverIndex.for_root(root)
+    mask = index.maneuver(2, 'left bank', 'green') & index.maneuver(4, 'koiogran turn', 'red')
+    index.names(mask)
+"""
+import sys
+import argparse
+
+from XwingDataDevTools.normalize.base import DataSession
+
+# Maneuver in each position of a speed of a dial, as documented in the ships schema.
+slots = [
+    'left turn',
+    'left bank',
+    'straight',
+    'right bank',
+    'right turn',
+    'koiogran turn',
+    'segnor\'s loop left',
+    'segnor\'s loop right',
+    'tallon roll left',
+    'tallon roll right',
+    'backwards left bank',
+    'backwards straight',
+    'backwards right bank',
+]
+
+colours = {
+    'white': 1,
+    'green': 2,
+    'red': 3,
+}
+
+
+def slot_index(slot):
+    if isinstance(slot, int):
+        return slot
+    try:
+        return slots.index(slot.lower().replace('-', ' '))
+    except ValueError:
+        raise ValueError('{!r} is not a maneuver, use one of {}'.format(slot, slots))
+
+
+def colour_value(colour):
+    if isinstance(colour, int):
+        return colour
+    try:
+        return colours[colour.lower()]
+    except KeyError:
+        raise ValueError('{!r} is not a colour, use one of {}'.format(colour, list(colours)))
+
+
+def energy_amount(amount):
+    try:
+        return int(amount)
+    except ValueError:
+        raise ValueError('{!r} is not an amount of energy'.format(amount))
+
+
+def bitmask(indexes, size):
+    """The bitmask with the bits at indexes set, built in one go rather than a bit at a time."""
+    bits = bytearray(size // 8 + 1)
+    for index in indexes:
+        bits[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class ManeuverIndex:
+    """
+    Bitmasks of the ships having each maneuver, by dial, speed, position and value.
+
+    Masks are looked up by `(dial, speed, slot, value)`, dial being either 'maneuvers', where
+    values are colours, or 'maneuvers_energy', where they are amounts of energy. Every query
+    returns a mask, to be combined with `&`, `|` and `~` (ei. `index.all & ~mask`) and turned
+    into ships with `select` or `names`.
+    """
+    dials = ['maneuvers', 'maneuvers_energy']
+
+    def __init__(self, ships):
+        self.ships = ships
+        self.all = (1 << len(ships)) - 1
+        self.masks = {}
+        self.available = {}
+
+        ships_by_cell = {}
+        ships_by_position = {}
+        for ship_index, ship in enumerate(ships):
+            for dial in self.dials:
+                for speed, row in enumerate(ship.get(dial, [])):
+                    for slot, value in enumerate(row):
+                        if value:
+                            ships_by_cell.setdefault((dial, speed, slot, value), []).append(
+                                ship_index
+                            )
+                            ships_by_position.setdefault((dial, speed, slot), []).append(
+                                ship_index
+                            )
+
+        for cell, indexes in ships_by_cell.items():
+            self.masks[cell] = bitmask(indexes, len(ships))
+        for position, indexes in ships_by_position.items():
+            self.available[position] = bitmask(indexes, len(ships))
+
+    @classmethod
+    def for_root(cls, root=None):
+        return cls(DataSession(root).load('ships'))
+
+    def maneuver(self, speed, slot, colour=None):
+        """Ships with the maneuver at that speed, in that colour or in any of them."""
+        slot = slot_index(slot)
+        if colour is None:
+            return self.available.get(('maneuvers', speed, slot), 0)
+        return self.masks.get(('maneuvers', speed, slot, colour_value(colour)), 0)
+
+    def energy(self, speed, slot, amount=None):
+        """Ships whose energy dial gives that amount for the maneuver, or any amount at all."""
+        slot = slot_index(slot)
+        if amount is None:
+            return self.available.get(('maneuvers_energy', speed, slot), 0)
+        return self.masks.get(('maneuvers_energy', speed, slot, amount), 0)
+
+    def superset(self, maneuvers, same_colour=True):
+        """
+        Ships with every maneuver available in the dial given, as found under `maneuvers`.
+        Unless told otherwise, maneuvers must be of the same colour as well.
+        """
+        mask = self.all
+        for speed, row in enumerate(maneuvers):
+            for slot, colour in enumerate(row):
+                if colour:
+                    mask &= self.maneuver(speed, slot, colour if same_colour else None)
+        return mask
+
+    def select(self, mask):
+        # Bits as a string, lowest first, rather than shifting the whole mask once per ship.
+        bits = bin(mask)[:1:-1]
+        return [ship for ship, bit in zip(self.ships, bits) if bit == '1']
+
+    def names(self, mask):
+        return [ship.get('name') for ship in self.select(mask)]
+
+    @staticmethod
+    def count(mask):
+        return bin(mask).count('1')
+
+
+def parse_term(term, value_type):
+    """Splits `SPEED:MANEUVER[:VALUE]`, ei. `2:left-bank:green` or `1:straight:2`."""
+    parts = term.split(':')
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError('{!r} is not SPEED:MANEUVER[:VALUE]'.format(term))
+    try:
+        speed, slot = int(parts[0]), slot_index(parts[1])
+        value = value_type(parts[2]) if len(parts) == 3 else None
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return speed, slot, value
+
+
+def maneuver_term(term):
+    return parse_term(term, colour_value)
+
+
+def energy_term(term):
+    return parse_term(term, energy_amount)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Lists the ships having every maneuver asked for.'
+    )
+    parser.add_argument('root', nargs='?', help='Data files directory.')
+    parser.add_argument('--maneuver', action='append', default=[], type=maneuver_term,
+                        metavar='SPEED:MANEUVER[:COLOUR]',
+                        help='A maneuver the ships must have, ei. 4:koiogran-turn:red.')
+    parser.add_argument('--energy', action='append', default=[], type=energy_term,
+                        metavar='SPEED:MANEUVER[:AMOUNT]',
+                        help='A maneuver the energy dial must give energy for, ei. 1:straight:2.')
+    parser.add_argument('--without', action='store_true',
+                        help='List the ships lacking any of them instead.')
+    args = parser.parse_args(argv)
+
+    index = ManeuverIndex.for_root(args.root)
+    mask = index.all
+    for speed, slot, colour in args.maneuver:
+        mask &= index.maneuver(speed, slot, colour)
+    for speed, slot, amount in args.energy:
+        mask &= index.energy(speed, slot, amount)
+    if args.without:
+        mask = index.all & ~mask
+
+    for name in index.names(mask):
+        print(name)
+    print('\n{} of {} ships'.format(index.count(mask), len(index.ships)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
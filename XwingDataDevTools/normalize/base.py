@@ -1,67 +1,325 @@
-import json
+import os
+import sys
+import difflib
+import functools
+import inspect
 import datetime
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections.abc import Mapping
 from pprint import pprint
 
+from XwingDataDevTools import codec, instrumentation
+from XwingDataDevTools.codec import content_hash
+from XwingDataDevTools.normalize.custom_indentation import get_layout
+from XwingDataDevTools.snapshots import SnapshotCache
+
 
 class XWingDataBaseMixin:
     root = '/home/lvisintini/src/xwing-data/data'
+    cache_root = os.path.expanduser('~/.cache/xwing-data-dev-tools')
+
+
+class DataSession:
+    """
+    Holds every data file loaded so far so a pipeline of tools can share them.
+
+    Each collection is parsed the first time it is requested and every tool gets the same
+    in-memory list. Tools hand their results back with `store` and the files are written once,
+    laid out as custom_indentation says, when `save` is called and only if their content
+    actually changed. In dry run mode nothing is written, a unified diff of every file that
+    would change is printed instead.
+
+    Unless told otherwise, files are loaded through the snapshot cache, so unchanged files are
+    unpickled instead of parsed. Loaded strings are interned, so the same names and texts repeated
+    across records and collections share one object. Several files can be loaded at once with
+    `load_many`, which reads them on a pool of `jobs` threads. On save, collections of
+    `encode_in_process_from` records or more are encoded in worker processes while the rest are
+    encoded here, then every file is written on a pool of threads.
+    """
+    dry_run = False
+    use_snapshots = True
+    use_interning = True
+    jobs = os.cpu_count() or 1
+    encode_in_process_from = 5000
+
+    def __init__(self, root=None, dry_run=None, use_snapshots=None):
+        self.root = root or XWingDataBaseMixin.root
+        if dry_run is not None:
+            self.dry_run = dry_run
+        if use_snapshots is not None:
+            self.use_snapshots = use_snapshots
+        self.snapshots = None
+        if self.use_snapshots:
+            self.snapshots = SnapshotCache(os.path.join(XWingDataBaseMixin.cache_root, 'snapshots'))
+        self.collections = {}
+        self.changed = []
+        self.hashes = {}
+        self.written = []
+
+    def path(self, source_key):
+        return '{}/{}.js'.format(self.root, source_key)
+
+    def read(self, source_key):
+        with open(self.path(source_key), 'r') as file_object:
+            content = file_object.read()
+        self.hashes[source_key] = content_hash(content)
+        instrumentation.count('bytes_read', len(content.encode('utf-8')))
+        return content
+
+    def fetch(self, source_key):
+        """Returns the content hash and the parsed data of a data file."""
+        if self.snapshots is not None:
+            file_hash, data = self.snapshots.load(self.path(source_key))
+        else:
+            content = self.read(source_key)
+            file_hash, data = self.hashes[source_key], codec.loads(content)
+        if self.use_interning:
+            instrumentation.count('memory_saved', codec.intern_strings(data))
+        return file_hash, data
+
+    def load(self, source_key):
+        if source_key not in self.collections:
+            self.hashes[source_key], self.collections[source_key] = self.fetch(source_key)
+        instrumentation.count('records', len(self.collections[source_key]))
+        return self.collections[source_key]
+
+    def load_many(self, source_keys):
+        missing = [key for key in dict.fromkeys(source_keys) if key not in self.collections]
+        if len(missing) > 1 and self.jobs > 1:
+            with ThreadPoolExecutor(min(len(missing), self.jobs)) as executor:
+                for source_key, (file_hash, data) in zip(
+                    missing, executor.map(self.fetch, missing)
+                ):
+                    self.hashes[source_key], self.collections[source_key] = file_hash, data
+        return [self.load(source_key) for source_key in source_keys]
+
+    def file_hash(self, source_key):
+        """Hash of the file as it is on disk, changes held in memory are not accounted for."""
+        if source_key not in self.hashes:
+            if self.snapshots is not None:
+                self.hashes[source_key] = self.snapshots.file_hash(self.path(source_key))
+            if self.hashes.get(source_key) is None:
+                self.read(source_key)
+        return self.hashes[source_key]
+
+    def forget(self, source_key):
+        """Drops what is known of a file, so it's loaded from disk again next time."""
+        self.collections.pop(source_key, None)
+        self.hashes.pop(source_key, None)
+        if source_key in self.changed:
+            self.changed.remove(source_key)
+
+    def store(self, source_key, data):
+        self.collections[source_key] = data
+        if source_key not in self.changed:
+            self.changed.append(source_key)
+
+    def write(self, source_key, content):
+        path = self.path(source_key)
+        new_hash = content_hash(content)
+        if os.path.exists(path) and self.file_hash(source_key) == new_hash:
+            return False
+
+        if self.dry_run:
+            current_content = ''
+            if os.path.exists(path):
+                with open(path, 'r') as file_object:
+                    current_content = file_object.read()
+            sys.stdout.writelines(difflib.unified_diff(
+                current_content.splitlines(keepends=True),
+                content.splitlines(keepends=True),
+                fromfile=path,
+                tofile='{} (normalized)'.format(path),
+            ))
+            return True
+
+        with open(path, 'w') as file_object:
+            file_object.write(content)
+        self.hashes[source_key] = new_hash
+        instrumentation.count('bytes_written', len(content.encode('utf-8')))
+        return True
+
+    def encode_all(self, source_keys):
+        large = [
+            key for key in source_keys
+            if len(self.collections[key]) >= self.encode_in_process_from
+        ]
+        if not large or self.jobs == 1:
+            return [encode(key, self.collections[key]) for key in source_keys]
+
+        with ProcessPoolExecutor(min(len(large), self.jobs)) as executor:
+            futures = {key: executor.submit(encode, key, self.collections[key]) for key in large}
+            contents = {
+                key: encode(key, self.collections[key]) for key in source_keys
+                if key not in futures
+            }
+            contents.update((key, future.result()) for key, future in futures.items())
+        return [contents[key] for key in source_keys]
+
+    def save(self):
+        contents = self.encode_all(self.changed)
+        if self.dry_run or len(self.changed) < 2 or self.jobs == 1:
+            written = [self.write(key, content) for key, content in zip(self.changed, contents)]
+        else:
+            with ThreadPoolExecutor(min(len(self.changed), self.jobs)) as executor:
+                written = list(executor.map(self.write, self.changed, contents))
+        self.written.extend([key for key, w in zip(self.changed, written) if w])
+        self.changed.clear()
+
+
+def encode(source_key, data):
+    return codec.dumps(data, get_layout(source_key))
+
+
+def package_modules(names):
+    """The modules of this package named and, recursively, those they take anything from."""
+    found = {}
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in found or not name.startswith('XwingDataDevTools.'):
+            continue
+        found[name] = module = sys.modules[name]
+        for value in vars(module).values():
+            if inspect.ismodule(value):
+                pending.append(value.__name__)
+            elif callable(value) and isinstance(getattr(value, '__module__', None), str):
+                # Classes and functions, memoized ones included.
+                pending.append(value.__module__)
+    return [found[name] for name in sorted(found)]
 
 
 class ToolBase:
-    def __init__(self):
+    """
+    Constructing a tool only sets it up over a session, `run` does the actual work. A tool can
+    be run as many times as needed, every run gets its own measurement.
+    """
+    # Whether the tool can run in a worker process, away from the terminal.
+    parallel = True
+
+    def __init__(self, session=None):
+        self.own_session = session is None
+        self.session = DataSession() if session is None else session
+        self.measurement = None
+
+    def run(self):
+        self.measurement = instrumentation.report.start(
+            self.__class__.__name__, 'normalizer' if self.output_keys() else 'analyzer'
+        )
         self.print_name()
 
+    @classmethod
+    def input_keys(cls):
+        keys = [
+            key for key in [getattr(cls, 'source_key', ''), getattr(cls, 'fk_source_key', None)]
+            if key
+        ]
+        keys.extend(getattr(cls, 'source_keys', []))
+        return keys
+
+    @classmethod
+    def output_keys(cls):
+        if issubclass(cls, SingleDataSaverMixin):
+            return [cls.source_key]
+        if issubclass(cls, MultipleDataSaverMixin):
+            return list(cls.source_keys)
+        return []
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def code_version(cls):
+        """
+        Hash of the source of every module the tool's code lives in, along with the modules of
+        this package they use (ei. codec, custom_indentation or card_text), so a change to any
+        helper a tool relies on makes it run again.
+        """
+        # The code running can't change, no matter what happens to the files meanwhile.
+        modules = package_modules([
+            klass.__module__ for klass in cls.__mro__
+            if klass.__module__.startswith('XwingDataDevTools.')
+        ])
+        return content_hash(''.join([inspect.getsource(module) for module in modules]))
+
+    def stage(self, stage):
+        return self.measurement.stage(stage)
+
     def print_name(self):
         print('\n{} {}'.format(self.__class__.__name__, '=' * (100 - len(self.__class__.__name__))))
 
 
 class SingleDataLoaderMixin:
     source_key = ''
-    root = None
-    data = []
 
     def load_data(self):
-        with open('{}/{}.js'.format(self.root, self.source_key), 'r') as file_object:
-            self.data.extend(json.load(file_object, object_pairs_hook=OrderedDict))
+        self.data = self.session.load(self.source_key)
 
 
 class SingleDataSaverMixin:
     source_key = ''
-    root = None
-    data = []
 
     def save_data(self):
-        with open('{}/{}.js'.format(self.root, self.source_key), 'w') as file_object:
-            json.dump(self.data, file_object, indent=2, ensure_ascii=False)
+        self.session.store(self.source_key, self.data)
+        if self.own_session:
+            self.session.save()
+
+
+class LazyCollections(Mapping):
+    """
+    The collections of a tool by source key, each loaded from the session when first accessed.
+
+    Only touched collections, those accessed or assigned, are ever loaded or saved back.
+    """
+
+    def __init__(self, session, source_keys):
+        self.session = session
+        self.source_keys = list(source_keys)
+        self.loaded = {}
+
+    def __getitem__(self, source_key):
+        if source_key not in self.loaded:
+            if source_key not in self.source_keys:
+                raise KeyError(source_key)
+            self.loaded[source_key] = self.session.load(source_key)
+        return self.loaded[source_key]
+
+    def __setitem__(self, source_key, data):
+        if source_key not in self.source_keys:
+            self.source_keys.append(source_key)
+        self.loaded[source_key] = data
+
+    def __iter__(self):
+        return iter(self.source_keys)
+
+    def __len__(self):
+        return len(self.source_keys)
+
+    def is_touched(self, source_key):
+        return source_key in self.loaded
 
 
 class MultipleDataLoaderMixin:
     source_keys = []
-    root = None
-    data = []
 
     def load_all_data(self):
-        for sk in self.source_keys:
-            self.load_data(sk)
+        self.data = LazyCollections(self.session, self.source_keys)
 
     def load_data(self, source_key):
-        with open('{}/{}.js'.format(self.root, source_key), 'r') as file_object:
-            self.data[source_key] = json.load(file_object, object_pairs_hook=OrderedDict)
+        self.data[source_key] = self.session.load(source_key)
 
 
 class MultipleDataSaverMixin:
     source_keys = []
-    root = None
-    data = []
 
     def save_all_data(self):
         for sk in self.source_keys:
-            self.save_data(sk)
+            if self.data.is_touched(sk):
+                self.save_data(sk)
+        if self.own_session:
+            self.session.save()
 
     def save_data(self, source_key):
-        with open('{}/{}.js'.format(self.root, source_key), 'w') as file_object:
-            json.dump(self.data[source_key], file_object, indent=2, ensure_ascii=False)
+        self.session.store(source_key, self.data[source_key])
 
 
 class PathFinderMixin:
@@ -87,11 +345,13 @@ class PathFinderMixin:
 
 
 class SingleDataAnalyzer(SingleDataLoaderMixin, XWingDataBaseMixin, ToolBase):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = []
-        self.load_data()
-        self.analise()
+        with self.stage('load'):
+            self.load_data()
+        with self.stage('analyse'):
+            self.analise()
 
     def analise(self):
         raise NotImplementedError
@@ -100,12 +360,15 @@ class SingleDataAnalyzer(SingleDataLoaderMixin, XWingDataBaseMixin, ToolBase):
 class SingleDataNormalizer(
     SingleDataSaverMixin, SingleDataLoaderMixin, XWingDataBaseMixin, ToolBase
 ):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = []
-        self.load_data()
-        self.normalize()
-        self.save_data()
+        with self.stage('load'):
+            self.load_data()
+        with self.stage('normalize'):
+            self.normalize()
+        with self.stage('save'):
+            self.save_data()
 
     def normalize(self):
         raise NotImplementedError
@@ -114,16 +377,21 @@ class SingleDataNormalizer(
 class SingleDataAnalyticalNormalizer(
     SingleDataSaverMixin, SingleDataLoaderMixin, XWingDataBaseMixin, ToolBase
 ):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = []
-        self.load_data()
+        with self.stage('load'):
+            self.load_data()
         print('BEFORE --------')
-        self.analise()
-        self.normalize()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('normalize'):
+            self.normalize()
         print('\nAFTER ---------')
-        self.analise()
-        self.save_data()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('save'):
+            self.save_data()
 
     def analise(self):
         raise NotImplementedError
@@ -133,11 +401,13 @@ class SingleDataAnalyticalNormalizer(
 
 
 class MultipleDataAnalyzer(MultipleDataLoaderMixin, XWingDataBaseMixin, ToolBase):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = {}
-        self.load_all_data()
-        self.analise()
+        with self.stage('load'):
+            self.load_all_data()
+        with self.stage('analyse'):
+            self.analise()
 
     def analise(self):
         raise NotImplementedError
@@ -146,12 +416,15 @@ class MultipleDataAnalyzer(MultipleDataLoaderMixin, XWingDataBaseMixin, ToolBase
 class MultipleDataNormalizer(
     MultipleDataSaverMixin, MultipleDataLoaderMixin, XWingDataBaseMixin, ToolBase
 ):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = {}
-        self.load_all_data()
-        self.normalize()
-        self.save_all_data()
+        with self.stage('load'):
+            self.load_all_data()
+        with self.stage('normalize'):
+            self.normalize()
+        with self.stage('save'):
+            self.save_all_data()
 
     def normalize(self):
         raise NotImplementedError
@@ -160,16 +433,21 @@ class MultipleDataNormalizer(
 class MultipleDataAnalyticalNormalizer(
     MultipleDataSaverMixin, MultipleDataLoaderMixin, XWingDataBaseMixin, ToolBase
 ):
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = {}
-        self.load_all_data()
+        with self.stage('load'):
+            self.load_all_data()
         print('BEFORE --------')
-        self.analise()
-        self.normalize()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('normalize'):
+            self.normalize()
         print('\nAFTER ---------')
-        self.analise()
-        self.save_all_data()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('save'):
+            self.save_all_data()
 
     def analise(self):
         raise NotImplementedError
@@ -184,17 +462,28 @@ class SingleDataCollector(
 
     field_name = None
     memory = {}
+    parallel = False
+
+    def __init__(self, session=None):
+        super().__init__(session)
+        # Answers given are remembered by this instance only, the class keeps its defaults.
+        self.memory = dict(self.memory)
 
-    def __init__(self):
-        super().__init__()
+    def run(self):
+        super().run()
         self.data = []
-        self.load_data()
+        with self.stage('load'):
+            self.load_data()
         print('BEFORE --------')
-        self.analise()
-        self.gather()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('normalize'):
+            self.gather()
         print('\nAFTER ---------')
-        self.analise()
-        self.save_data()
+        with self.stage('analyse'):
+            self.analise()
+        with self.stage('save'):
+            self.save_data()
 
     def analise(self):
         pprint(self.memory)
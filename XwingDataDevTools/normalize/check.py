@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import json
+import argparse
+
+from XwingDataDevTools.normalize.base import XWingDataBaseMixin
+from XwingDataDevTools.normalize.custom_indentation import get_layout, layouts
+from XwingDataDevTools.normalize.order import preferred_order_normalizers
+
+whitespace = re.compile(r'\s*')
+separator = re.compile(r'\s*([,\]])')
+
+
+def record_id(record, index):
+    if isinstance(record, dict) and 'id' in record:
+        return record['id']
+    return '#{}'.format(index)
+
+
+def check_file(path, layout, order=None):
+    """
+    Checks the records of a data file without rewriting it.
+
+    Records are decoded one at a time straight from the file. Each is checked for key order
+    against the order normalizer's spec, and its text is compared with the record's encoding as
+    the encoding streams by. Returns the ids of the records out of order, those not laid out as
+    they'd be written and whether what surrounds the records is laid out as it'd be written.
+    """
+    with open(path, 'r') as file_object:
+        content = file_object.read()
+
+    decoder = json.JSONDecoder()
+    unordered, misplaced = [], []
+
+    position = whitespace.match(content).end()
+    if not content.startswith('[', position):
+        raise ValueError('{} does not hold a list of records'.format(path))
+    envelope_ok = content.startswith('[\n  ') or content == '[]'
+    position = whitespace.match(content, position + 1).end()
+
+    index = 0
+    while not content.startswith(']', position):
+        record, end = decoder.raw_decode(content, position)
+        if order is not None and not order.is_ordered(record):
+            unordered.append(record_id(record, index))
+        if not layout.matches(record, content, position):
+            misplaced.append(record_id(record, index))
+
+        match = separator.match(content, end)
+        if match is None:
+            raise ValueError('{} is not valid JSON after record {}'.format(path, index))
+        if match.group(1) == ',':
+            position = whitespace.match(content, match.end()).end()
+            envelope_ok = envelope_ok and content[end:position] == ',\n  '
+        else:
+            position = match.start(1)
+            envelope_ok = envelope_ok and content[end:position] == '\n'
+        index += 1
+
+    envelope_ok = envelope_ok and position + 1 == len(content)
+    return unordered, misplaced, envelope_ok
+
+
+def source_keys():
+    keys = [normalizer.source_key for normalizer in preferred_order_normalizers]
+    return keys + [key for key in layouts if key not in keys]
+
+
+def check(root=None):
+    """Checks every data file under root, returns whether all of them are normalized."""
+    root = root or XWingDataBaseMixin.root
+    orders = {
+        normalizer.source_key: normalizer.record_order()
+        for normalizer in preferred_order_normalizers
+    }
+    clean = True
+    for source_key in source_keys():
+        path = '{}/{}.js'.format(root, source_key)
+        if not os.path.exists(path):
+            continue
+        unordered, misplaced, envelope_ok = check_file(
+            path, get_layout(source_key), orders.get(source_key)
+        )
+        if not (unordered or misplaced) and envelope_ok:
+            continue
+        clean = False
+        print('\n{}'.format(path))
+        if unordered:
+            print('  Fields out of order in: {}'.format(', '.join(map(str, unordered))))
+        if misplaced:
+            print('  Not laid out as normalized: {}'.format(', '.join(map(str, misplaced))))
+        if not envelope_ok:
+            print('  Not laid out as normalized around its records')
+    return clean
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Checks data files are in the preferred field order and layout, '
+                    'without rewriting them.'
+    )
+    parser.add_argument('root', nargs='?', help='Data files directory.')
+    args = parser.parse_args(argv)
+
+    if check(args.root):
+        print('All data files are normalized')
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
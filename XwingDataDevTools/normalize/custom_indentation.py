@@ -1,18 +1,12 @@
-import _ctypes
+import os
+import sys
 import json
-import re
-
-from XwingDataDevTools.normalize.base import SingleDataNormalizer
+import argparse
+from json.encoder import encode_basestring
 
 # http://stackoverflow.com/questions/13249415/can-i-implement-custom-indentation-for-pretty-printing-in-python-s-json-module
 
 
-def di(obj_id):
-    # from http://stackoverflow.com/a/15012814/355230
-    """ Reverse of id() function. """
-    return _ctypes.PyObj_FromPtr(obj_id)
-
-
 class NoIndent(object):
     def __init__(self, value):
         self.value = value
@@ -22,100 +16,175 @@ class NoIndent(object):
 
 
 class NoIndentEncoder(json.JSONEncoder):
+    """
+    Encodes NoIndent values on a single line, regardless of the indentation used.
+
+    Each NoIndent value is encoded as a placeholder string, the registry maps that placeholder's
+    encoded chunk to the value's single line JSON. The pure python encoder always yields such a
+    chunk on its own, so it is swapped as the output streams by. It's used even without an
+    indent, as the C encoder would join placeholders with what surrounds them.
+    """
     FORMAT_SPEC = "@@{}@@"
-    regex = re.compile(FORMAT_SPEC.format(r"(\d+)"))
 
     def default(self, obj):
         if not isinstance(obj, NoIndent):
             return super().default(obj)
-        return self.FORMAT_SPEC.format(id(obj))
-
-    def encode(self, obj):
-        format_spec = self.FORMAT_SPEC  # local var to expedite access
-        result = super().encode(obj)
-        for match in self.regex.finditer(result):
-            id = int(match.group(1))
-            result = result.replace('"{}"'.format(format_spec.format(id)),
-                                    di(int(id)).to_json())
-        return result
-
-
-class SameLineData(SingleDataNormalizer):
-    @staticmethod
-    def filter(model):
-        raise True
-
-    def save_data(self):
-        with open('{}/{}.js'.format(self.root, self.source_key), 'w') as file_object:
-            file_object.write(
-                json.dumps(self.data, indent=2, cls=NoIndentEncoder, ensure_ascii=False)
-            )
-
-
-class SameLineShipsNormalizer(SameLineData):
-    source_key = 'ships'
-
-    def normalize(self):
-        for model in self.data:
-            model['maneuvers'] = [NoIndent(speed) for speed in model['maneuvers']]
-            if 'maneuvers_energy' in model:
-                model['maneuvers_energy'] = [
-                    NoIndent(speed) for speed in model['maneuvers_energy']
-                ]
-
-
-class SameLineSourcesNormalizer(SameLineData):
-    source_key = 'sources'
-
-    def normalize(self):
-        for model in self.data:
-            model['contents']['ships'] = [
-                NoIndent(ship) for ship in model['contents']['ships']
-            ]
-            model['contents']['pilots'] = [
-                NoIndent(pilot) for pilot in model['contents']['pilots']
-            ]
-            model['contents']['upgrades'] = [
-                NoIndent(upgrade) for upgrade in model['contents']['upgrades']
-            ]
-
-            if 'conditions' in model['contents']:
-                model['contents']['conditions'] = [
-                    NoIndent(condition) for condition in model['contents']['conditions']
-                ]
-
-
-class SameLinePilotsNormalizer(SameLineData):
-    source_key = 'pilots'
-
-    def normalize(self):
-        for model in self.data:
-            model['ship'] = NoIndent(model['ship'])
-            if 'conditions' in model:
-                model['conditions'] = [NoIndent(cond) for cond in model['conditions']]
-
-
-class SameLineUpgradesNormalizer(SameLineData):
-    source_key = 'upgrades'
-
-    def normalize(self):
-        for model in self.data:
-            if 'conditions' in model:
-                model['conditions'] = [NoIndent(cond) for cond in model['conditions']]
-            if 'ship' in model:
-                model['ship'] = [NoIndent(ship) for ship in model['ship']]
-            if 'ships' in model:
-                model['ships'] = [NoIndent(ship) for ship in model['ships']]
-            if 'grants' in model:
-                model['grants'] = [NoIndent(grant) for grant in model['grants']]
-
-
-def same_line_indent():
-    SameLineShipsNormalizer()
-    SameLineSourcesNormalizer()
-    SameLinePilotsNormalizer()
-    SameLineUpgradesNormalizer()
+        placeholder = self.FORMAT_SPEC.format(len(self.fragments))
+        self.fragments['"{}"'.format(placeholder)] = obj.to_json()
+        return placeholder
+
+    def iterencode(self, o, _one_shot=False):
+        self.fragments = {}
+        fragments = self.fragments
+        for chunk in super().iterencode(o, _one_shot=False):
+            yield fragments.pop(chunk, chunk)
+
+
+class Layout:
+    """
+    Same line layout for the records of a data file.
+
+    Paths are relative to each record, dot separated, with `[*]` standing for every item of a
+    list. Values matched by a path are written on a single line, like NoIndent values used to
+    be. Everything else is indented exactly as json.dumps(indent=2, ensure_ascii=False) does.
+    """
+    indent = '  '
+    any_item = '[*]'
+
+    def __init__(self, paths=()):
+        self.paths = list(paths)
+        self.rules = {}
+        for path in self.paths:
+            steps = path.replace(self.any_item, '.' + self.any_item).split('.')
+            rules = self.rules
+            for step in steps[:-1]:
+                rules = rules.setdefault(step, {})
+            rules[steps[-1]] = True
+
+    def encode(self, data):
+        return ''.join(self.iterencode(data))
+
+    def iterencode(self, data):
+        return self._iterencode(data, {self.any_item: self.rules} if self.rules else None, 0)
+
+    def iterencode_record(self, record):
+        """Encodes a single record, indented as it is within its data file."""
+        return self._iterencode(record, self.rules or None, 1)
+
+    def matches(self, record, content, start):
+        """
+        Whether content holds the record laid out as it'd be written, starting at start. It's
+        compared chunk by chunk as it's encoded, so it stops at the first difference.
+        """
+        position = start
+        for chunk in self.iterencode_record(record):
+            if not content.startswith(chunk, position):
+                return False
+            position += len(chunk)
+        return True
+
+    def plain(self, value, level):
+        """Encodes value as json.dumps(indent=2, ensure_ascii=False) would, nested at level."""
+        if isinstance(value, str):
+            return encode_basestring(value)
+        if not isinstance(value, (dict, list, tuple)):
+            # Indenting makes no difference here, but it'd keep json from encoding it in C.
+            return json.dumps(value)
+        content = json.dumps(value, indent=2, ensure_ascii=False)
+        return content.replace('\n', '\n' + self.indent * level) if level else content
+
+    def _iterencode(self, value, rules, level):
+        if isinstance(value, NoIndent):
+            yield value.to_json()
+        elif rules is True:
+            yield json.dumps(value)
+        elif rules is None:
+            # Nothing nested is laid out on a single line, let json do all the work.
+            yield self.plain(value, level)
+        elif isinstance(value, dict) and value:
+            newline_indent = '\n' + self.indent * (level + 1)
+            separator = '{'
+            for key, item in value.items():
+                item_rules = rules.get(key)
+                yield '{}{}{}: '.format(
+                    separator,
+                    newline_indent,
+                    encode_basestring(key if isinstance(key, str) else json.dumps(key)),
+                )
+                separator = ','
+                if item_rules is None and not isinstance(item, NoIndent):
+                    yield self.plain(item, level + 1)
+                else:
+                    yield from self._iterencode(item, item_rules, level + 1)
+            yield '\n' + self.indent * level + '}'
+        elif isinstance(value, (list, tuple)) and value:
+            newline_indent = '\n' + self.indent * (level + 1)
+            item_rules = rules.get(self.any_item)
+            separator = '['
+            for item in value:
+                yield separator + newline_indent
+                separator = ','
+                yield from self._iterencode(item, item_rules, level + 1)
+            yield '\n' + self.indent * level + ']'
+        else:
+            yield self.plain(value, level)
+
+
+layouts = {
+    'ships': Layout([
+        'maneuvers[*]',
+        'maneuvers_energy[*]',
+    ]),
+    'sources': Layout([
+        'contents.ships[*]',
+        'contents.pilots[*]',
+        'contents.upgrades[*]',
+        'contents.conditions[*]',
+    ]),
+    'pilots': Layout([
+        'ship',
+        'conditions[*]',
+    ]),
+    'upgrades': Layout([
+        'conditions[*]',
+        'ship[*]',
+        'ships[*]',
+        'grants[*]',
+    ]),
+}
+
+
+def get_layout(source_key):
+    return layouts.get(source_key) or Layout()
+
+
+def same_line_indent(root=None, dry_run=False):
+    """Lays out every data file under root again, as saving it would, and nothing else."""
+    # Imported here as the session lays out files through this very module.
+    from XwingDataDevTools.normalize.base import DataSession
+
+    session = DataSession(root, dry_run=dry_run)
+    for name in sorted(os.listdir(session.root)):
+        source_key, extension = os.path.splitext(name)
+        if extension == '.js':
+            session.store(source_key, session.load(source_key))
+    session.save()
+    return session.written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Lays out data files as they are when saved by any tool.'
+    )
+    parser.add_argument('root', nargs='?', help='Data files directory.')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print a diff of every file that would change instead.')
+    args = parser.parse_args(argv)
+
+    for source_key in same_line_indent(args.root, args.dry_run):
+        print('Laid out {}'.format(source_key))
+    return 0
 
 
 if __name__ == '__main__':
-    same_line_indent()
+    sys.exit(main())
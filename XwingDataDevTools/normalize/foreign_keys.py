@@ -1,4 +1,3 @@
-import json
 from collections import OrderedDict
 
 from XwingDataDevTools.normalize.base import SingleDataAnalyticalNormalizer
@@ -9,11 +8,43 @@ class ForeignKeyNormalization(SingleDataAnalyticalNormalizer):
     fk_field_path = None
     pk_name = None
 
-    def __init__(self):
+    def __init__(self, session=None):
         self.fk_data = []
-        with open('{}/{}.js'.format(self.root, self.fk_source_key), 'r') as file_object:
-            self.fk_data.extend(json.load(file_object, object_pairs_hook=OrderedDict))
-        super().__init__()
+        self.fk_models_by_id = {}
+        self.fk_models_by_name = {}
+        super().__init__(session)
+
+    def load_data(self):
+        super().load_data()
+        self.fk_data = self.session.load(self.fk_source_key)
+        self.index_fk_data()
+
+    def index_fk_data(self):
+        # First model wins, just like scanning fk_data in order would.
+        self.fk_models_by_id = {}
+        self.fk_models_by_name = {}
+        for fk_model in self.fk_data:
+            if 'id' in fk_model:
+                self.fk_models_by_id.setdefault(fk_model['id'], fk_model)
+            self.fk_models_by_name.setdefault(fk_model['name'], fk_model)
+
+    def get_fk_model_by_id(self, fk, pk):
+        try:
+            return self.fk_models_by_id[pk]
+        except KeyError:
+            raise ValueError(
+                'Model for fk {!r} not found, no id {!r} in {}'.format(fk, pk, self.fk_source_key)
+            )
+
+    def get_fk_model_by_name(self, fk, name):
+        try:
+            return self.fk_models_by_name[name]
+        except KeyError:
+            raise ValueError(
+                'Model for fk {!r} not found, no name {!r} in {}'.format(
+                    fk, name, self.fk_source_key
+                )
+            )
 
     def analise(self):
         print('Models in fk data', len(self.fk_data))
@@ -49,18 +80,10 @@ class ForeignKeyNormalization(SingleDataAnalyticalNormalizer):
 class SimpleForeignKeyNormalization(ForeignKeyNormalization):
     def get_fk_model(self, fk, current_model):
         if isinstance(fk, dict) and self.pk_name in fk:
-            model = next(
-                (fk_model for fk_model in self.fk_data if fk_model['id'] == fk[self.pk_name])
-            )
+            return self.get_fk_model_by_id(fk, fk[self.pk_name])
         elif isinstance(fk, str) or isinstance(fk, bytes):
-            model = next((fk_model for fk_model in self.fk_data if fk_model['name'] == fk))
-        else:
-            raise ValueError('fk {!r} is not recognized please, check!!'.format(fk))
-
-        if model is None:
-            raise ValueError('Model for fk {!r} not found'.format(fk))
-
-        return model
+            return self.get_fk_model_by_name(fk, fk)
+        raise ValueError('fk {!r} is not recognized please, check!!'.format(fk))
 
     def is_fk_normalized(self, fk, current_model):
         return isinstance(fk, dict) and self.pk_name in fk and 'name' in fk
@@ -134,20 +157,10 @@ class SourceContentsForeignKeyNormalization(ForeignKeyNormalization):
 
     def get_fk_model(self, fk, current_model):
         if isinstance(fk, dict) and self.pk_name in fk:
-            model = next(
-                (fk_model for fk_model in self.fk_data if fk_model['id'] == fk[self.pk_name])
-            )
+            return self.get_fk_model_by_id(fk, fk[self.pk_name])
         elif isinstance(fk, tuple) and fk[0].isdigit():
-            model = next(
-                (fk_model for fk_model in self.fk_data if fk_model['id'] == int(fk[0]))
-            )
-        else:
-            raise ValueError('fk {!r} is not recognized please, check!!'.format(fk))
-
-        if model is None:
-            raise ValueError('Model for fk {!r} not found'.format(fk))
-
-        return model
+            return self.get_fk_model_by_id(fk, int(fk[0]))
+        raise ValueError('fk {!r} is not recognized please, check!!'.format(fk))
 
     def construct_new_fk(self, fk, current_model):
         if self.is_fk_normalized(fk, current_model):
@@ -232,18 +245,12 @@ class SourceShipsForeignKeyNormalization(SourceContentsForeignKeyNormalization):
 
     def get_fk_model(self, fk, model):
         if isinstance(fk, dict) and 'ship_id' in fk:
-            model = next((ship for ship in self.fk_data if ship['id'] == fk['ship_id']))
+            return self.get_fk_model_by_id(fk, fk['ship_id'])
         elif isinstance(fk, tuple) and fk[0].isdigit():
-            model = next((ship for ship in self.fk_data if ship['id'] == int(fk[0])))
+            return self.get_fk_model_by_id(fk, int(fk[0]))
         elif isinstance(fk, str) or isinstance(fk, bytes):
-            model = next((ship for ship in self.fk_data if ship['name'] == fk))
-        else:
-            raise ValueError('fk {!r} is not recognized please, check!!')
-
-        if model is None:
-            raise ValueError('Ship for pk {!r} not found'.format(fk))
-
-        return model
+            return self.get_fk_model_by_name(fk, fk)
+        raise ValueError('fk {!r} is not recognized please, check!!'.format(fk))
 
     def construct_new_fk(self, fk, model):
         if self.is_fk_normalized(fk, model):
@@ -329,11 +336,11 @@ class UpgradeShipsForeignKeyNormalization(UpgradeShipForeignKeyNormalization):
 
 
 if __name__ == '__main__':
-    SourceShipsForeignKeyNormalization()
-    SourceUpgradesForeignKeyNormalization()
-    SourceConditionsForeignKeyNormalization()
-    SourcePilotsForeignKeyNormalization()
-    UpgradeConditionsForeignKeyNormalization()
-    UpgradeShipsForeignKeyNormalization()
-    PilotConditionsForeignKeyNormalization()
-    PilotShipForeignKeyNormalization()
+    SourceShipsForeignKeyNormalization().run()
+    SourceUpgradesForeignKeyNormalization().run()
+    SourceConditionsForeignKeyNormalization().run()
+    SourcePilotsForeignKeyNormalization().run()
+    UpgradeConditionsForeignKeyNormalization().run()
+    UpgradeShipsForeignKeyNormalization().run()
+    PilotConditionsForeignKeyNormalization().run()
+    PilotShipForeignKeyNormalization().run()
@@ -11,9 +11,9 @@ class AddMissingSlots(SingleDataCollector):
         294: 'Modification',
     }
 
-    def __init__(self):
+    def __init__(self, session=None):
         self.slots = []
-        super().__init__()
+        super().__init__(session)
 
     def analise(self):
         for model in self.data:
@@ -164,6 +164,6 @@ class AddMissingAnnouncedDate(DateDataCollector):
     }
 
 if __name__ == '__main__':
-    AddMissingSlots()
-    AddMissingReleaseDate()
-    AddMissingAnnouncedDate()
+    AddMissingSlots().run()
+    AddMissingReleaseDate().run()
+    AddMissingAnnouncedDate().run()
@@ -1,3 +1,5 @@
+from collections import defaultdict, deque
+
 from XwingDataDevTools.normalize.base import (
     SingleDataAnalyticalNormalizer, MultipleDataNormalizer
 )
@@ -6,10 +8,10 @@ from XwingDataDevTools.normalize.base import (
 class AddModelIds(SingleDataAnalyticalNormalizer):
     """Adds 1-based ids to models if missing"""
 
-    def __init__(self):
+    def __init__(self, session=None):
         self.max_id = None
         self.min_id = None
-        super().__init__()
+        super().__init__(session)
 
     def analise(self):
         ids = [model['id'] for model in self.data if 'id' in model]
@@ -30,6 +32,37 @@ class AddModelIds(SingleDataAnalyticalNormalizer):
                 auto_increment_value += 1
 
 
+class NameIndex:
+    """
+    Maps every name in a collection to the ids of the models carrying it, in file order.
+
+    Many-to-one references (ei. pilots to their ship) always resolve a shared name to its first
+    id. One-to-one references, like the contents of a source, pop the ids of a shared name (ei.
+    the same pilot in several factions) first in, first out instead. The last id of a name is
+    never popped so any further reference to it still resolves.
+    """
+
+    def __init__(self, models):
+        self.ids = defaultdict(deque)
+        for model in models:
+            self.ids[model['name']].append(model['id'])
+
+    def get(self, name):
+        ids = self.ids.get(name)
+        if not ids:
+            raise ValueError('No model named {!r}'.format(name))
+        return ids
+
+    def first(self, name):
+        return self.get(name)[0]
+
+    def pop(self, name):
+        ids = self.get(name)
+        if len(ids) > 1:
+            return ids.popleft()
+        return ids[0]
+
+
 class RefreshIdsUsingNames(MultipleDataNormalizer):
     source_keys = ['pilots', 'ships', 'sources', 'conditions', 'upgrades']
 
@@ -38,33 +71,33 @@ class RefreshIdsUsingNames(MultipleDataNormalizer):
         print('Nothing to print')
 
     def normalize(self):
-        # FIXME: Get all models by name and pop them out, assume FIFO
+        # Many pilots fly the same ship and share conditions, they all get the first id.
+        ships = NameIndex(self.data['ships'])
+        conditions = NameIndex(self.data['conditions'])
         for model in self.data['pilots']:
-            fk_model = next((m for m in self.data['ships'] if m['name'] == model['ship']['name']))
-            model['ship']['ship_id'] = fk_model['id']
+            model['ship']['ship_id'] = ships.first(model['ship']['name'])
 
-            if 'conditions' in model:
-                for fk in model['conditions']:
-                    fk_model = next((m for m in self.data['conditions'] if m['name'] == fk['name']))
-                    fk['condition_id'] = fk_model['id']
+            for fk in model.get('conditions', []):
+                fk['condition_id'] = conditions.first(fk['name'])
 
+        # Each model is the content of a single source, shared names are popped in file order
+        # from indexes of their own.
+        ships = NameIndex(self.data['ships'])
+        conditions = NameIndex(self.data['conditions'])
+        pilots = NameIndex(self.data['pilots'])
+        upgrades = NameIndex(self.data['upgrades'])
         for model in self.data['sources']:
-            if 'conditions' in model['contents']:
-                for fk in model['contents']['conditions']:
-                    fk_model = next((m for m in self.data['conditions'] if m['name'] == fk['name']))
-                    fk['condition_id'] = fk_model['id']
+            for fk in model['contents'].get('conditions', []):
+                fk['condition_id'] = conditions.pop(fk['name'])
 
             for fk in model['contents']['ships']:
-                fk_model = next((m for m in self.data['ships'] if m['name'] == fk['name']))
-                fk['ship_id'] = fk_model['id']
+                fk['ship_id'] = ships.pop(fk['name'])
 
             for fk in model['contents']['pilots']:
-                fk_model = next((m for m in self.data['pilots'] if m['name'] == fk['name']))
-                fk['pilot_id'] = fk_model['id']
+                fk['pilot_id'] = pilots.pop(fk['name'])
 
             for fk in model['contents']['upgrades']:
-                fk_model = next((m for m in self.data['upgrades'] if m['name'] == fk['name']))
-                fk['upgrade_id'] = fk_model['id']
+                fk['upgrade_id'] = upgrades.pop(fk['name'])
 
 
 class AddShipsIds(AddModelIds):
@@ -72,5 +105,5 @@ class AddShipsIds(AddModelIds):
 
 
 if __name__ == '__main__':
-    AddShipsIds()
-    #RefreshIdsUsingNames()
+    AddShipsIds().run()
+    #RefreshIdsUsingNames().run()
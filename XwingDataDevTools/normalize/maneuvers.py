@@ -1,28 +1,11 @@
+from XwingDataDevTools.maneuver_grid import ManeuverGrid
 from XwingDataDevTools.normalize.base import SingleDataAnalyticalNormalizer
 
 
-class ManeuverNormalizer(SingleDataAnalyticalNormalizer):
-    source_key = 'ships'
-
-    min_maneuvers_override = 13
-    min_speed_override = 6
-
-    def __init__(self):
-        self.filtered_max_speed = 0
-        self.filtered_min_speed = 1000
-        self.max_speed = 0
-        self.min_speed = 1000
-        self.filtered_max_maneuvers = 0
-        self.filtered_min_maneuvers = 1000
-        self.max_maneuvers = 0
-        self.min_maneuvers = 1000
-        self.types = set()
-        super().__init__()
-
-    def filter(self, model):
-        raise NotImplementedError
+class DialStats:
+    """What the dials of the ships of a size look like, found over all of them at once."""
 
-    def analise(self):
+    def __init__(self, grids):
         self.filtered_max_speed = 0
         self.filtered_min_speed = 1000
         self.max_speed = 0
@@ -32,33 +15,26 @@ class ManeuverNormalizer(SingleDataAnalyticalNormalizer):
         self.max_maneuvers = 0
         self.min_maneuvers = 1000
         self.types = set()
-        for model in self.data:
-            if self.filter(model):
-                if 'maneuvers' not in model:
-                    print(model['name'])
-                    continue
-
-                speed = len(
-                    ''.join(['1' if any(m) else '0' for m in model['maneuvers']]).rstrip('0')
-                )
-
-                self.filtered_max_speed = max(speed, self.filtered_max_speed)
-                self.filtered_min_speed = min(speed, self.filtered_min_speed)
-                self.max_speed = max(len(model['maneuvers']), self.max_speed)
-                self.min_speed = min(len(model['maneuvers']), self.min_speed)
-
-                for speed in model['maneuvers']:
-                    maneuver = ''.join([str(s) for s in speed]).rstrip('0')
-                    self.filtered_max_maneuvers = max(len(maneuver), self.filtered_max_maneuvers)
-                    self.filtered_min_maneuvers = min(len(maneuver), self.filtered_min_maneuvers)
-                    self.max_maneuvers = max(len(speed), self.max_maneuvers)
-                    self.min_maneuvers = min(len(speed), self.min_maneuvers)
-
-                    if len(speed) == 0:
-                        self.types.add(None)
-                    else:
-                        self.types = self.types.union(speed)
 
+        for grid in grids:
+            self.filtered_max_speed = max(grid.max_speed, self.filtered_max_speed)
+            self.filtered_min_speed = min(grid.max_speed, self.filtered_min_speed)
+            self.max_speed = max(grid.speeds, self.max_speed)
+            self.min_speed = min(grid.speeds, self.min_speed)
+
+        # Every row of every dial at once.
+        rows = ManeuverGrid.stack(grids)
+        if rows.speeds:
+            widths = rows.row_widths()
+            self.filtered_max_maneuvers = max(widths)
+            self.filtered_min_maneuvers = min(widths)
+            self.max_maneuvers = max(rows.lengths)
+            self.min_maneuvers = min(rows.lengths)
+            self.types.update(rows.colour_counts())
+            if 0 in rows.lengths:
+                self.types.add(None)
+
+    def print(self):
         print('Max Speed', self.max_speed)
         print('Filtered Max Speed', self.filtered_max_speed)
         print('Min Speed', self.min_speed)
@@ -70,76 +46,86 @@ class ManeuverNormalizer(SingleDataAnalyticalNormalizer):
         print('Min Maneuvers', self.min_maneuvers)
         print('Filtered Min Maneuvers', self.filtered_min_maneuvers)
 
+
+class ManeuverNormalizer(SingleDataAnalyticalNormalizer):
+    """
+    Makes every dial of ships of the same size as big as the biggest of them, or as the minimum
+    set for the size if bigger. Ships of every size are handled in the same pass over ships.js.
+
+    Ships are sorted into a bucket per size as their dials are read, once. Stats are worked out
+    per bucket and the dials, and energy dials for the sizes that have them, are fitted to them
+    in a second pass that also fills the buckets looked at by the analysis after normalizing.
+    """
+    source_key = 'ships'
+    sizes = ['small', 'large', 'huge']
+
+    min_maneuvers_override = {'small': 13, 'large': 13, 'huge': 5}
+    min_speed_override = {'small': 6, 'large': 6, 'huge': 5}
+    # Sizes whose maneuvers_energy is fitted along with their maneuvers.
+    energy_sizes = ['huge']
+
+    def __init__(self, session=None):
+        self.dials = None
+        self.stats = {}
+        super().__init__(session)
+
+    def run(self):
+        self.dials = None
+        super().run()
+
+    def bucket(self):
+        dials = {size: [] for size in self.sizes}
+        for model in self.data:
+            bucket = dials.get(model['size'])
+            if bucket is None:
+                continue
+            if 'maneuvers' not in model:
+                print(model['name'])
+                continue
+            bucket.append(ManeuverGrid.from_json(model['maneuvers']))
+        return dials
+
+    def analise(self):
+        if self.dials is None:
+            self.dials = self.bucket()
+        self.stats = {size: DialStats(grids) for size, grids in self.dials.items()}
+        for size, stats in self.stats.items():
+            print('\n{} ships'.format(size.capitalize()))
+            stats.print()
+
+    def fit(self, rows, size):
+        """Pads or cuts down every speed of a dial to the size of the biggest dial around."""
+        stats = self.stats[size]
+        return ManeuverGrid.from_json(rows).fit(
+            max(stats.filtered_max_speed, self.min_speed_override[size]),
+            max(stats.filtered_max_maneuvers, self.min_maneuvers_override[size]),
+            cut_from=stats.filtered_max_maneuvers,
+        )
+
     def normalize(self):
+        self.dials = {size: [] for size in self.sizes}
         for model in self.data:
-            if self.filter(model):
-                if 'maneuvers' not in model:
-                    model['maneuvers'] = []
-
-                for index in range(len(model['maneuvers'])):
-                    if len(model['maneuvers'][index]) > self.filtered_max_maneuvers:
-                        model['maneuvers'][index] = model['maneuvers'][index][0:max(
-                            self.filtered_max_maneuvers, self.min_maneuvers_override
-                        )]
-                    else:
-                        model['maneuvers'][index].extend([0]*(max(
-                            self.filtered_max_maneuvers, self.min_maneuvers_override
-                        ) - len(model['maneuvers'][index])))
-
-                max_speed = len(model['maneuvers'])
-                if max_speed < max(self.filtered_max_speed, self.min_speed_override):
-                    model['maneuvers'].extend(
-                        [
-                         [0] * max(self.filtered_max_maneuvers, self.min_maneuvers_override)
-                        ] * (max(self.filtered_max_speed, self.min_speed_override) - max_speed)
-                    )
+            size = model['size']
+            if size not in self.dials:
+                continue
+            grid = self.fit(model.get('maneuvers', []), size)
+            model['maneuvers'] = grid.to_json()
+            self.dials[size].append(grid)
+            if size in self.energy_sizes:
+                model['maneuvers_energy'] = self.fit(model['maneuvers_energy'], size).to_json()
 
 
 class SmallShipManeuverNormalizer(ManeuverNormalizer):
-    def filter(self, model):
-        return model['size'] == 'small'
+    sizes = ['small']
 
 
 class LargeShipManeuverNormalizer(ManeuverNormalizer):
-    def filter(self, model):
-        return model['size'] == 'large'
+    sizes = ['large']
 
 
 class HugeShipManeuverNormalizer(ManeuverNormalizer):
-    min_maneuvers_override = 5
-    min_speed_override = 5
-
-    def filter(self, model):
-        return model['size'] == 'huge'
-
-    def normalize(self):
-        super().normalize()
-        # Handle maneuvers_energy attr
-        for model in self.data:
-            if self.filter(model):
-                if 'maneuvers' not in model:
-                    model['maneuvers_energy'] = []
-
-                for index in range(len(model['maneuvers_energy'])):
-                    if len(model['maneuvers_energy'][index]) > self.filtered_max_maneuvers:
-                        model['maneuvers_energy'][index] = model['maneuvers_energy'][index][0:max(
-                            self.filtered_max_maneuvers, self.min_maneuvers_override
-                        )]
-                    else:
-                        model['maneuvers_energy'][index].extend([0]*(max(
-                            self.filtered_max_maneuvers, self.min_maneuvers_override
-                        ) - len(model['maneuvers_energy'][index])))
-
-                max_speed = len(model['maneuvers_energy'])
-                if max_speed < max(self.filtered_max_speed, self.min_speed_override):
-                    model['maneuvers_energy'].extend(
-                        [
-                         [0] * max(self.filtered_max_maneuvers, self.min_maneuvers_override)
-                        ] * (max(self.filtered_max_speed, self.min_speed_override) - max_speed)
-                    )
+    sizes = ['huge']
 
 
 if __name__ == '__main__':
-    SmallShipManeuverNormalizer()
-    LargeShipManeuverNormalizer()
-    HugeShipManeuverNormalizer()
+    ManeuverNormalizer().run()
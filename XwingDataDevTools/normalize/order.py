@@ -1,9 +1,100 @@
 from pprint import pprint
-from collections import OrderedDict
+from operator import itemgetter
 
 from XwingDataDevTools.normalize.base import SingleDataAnalyticalNormalizer
 
 
+class Ranking:
+    """Position of each value in a preferred order, found without scanning it."""
+
+    def __init__(self, order):
+        self.rank = {value: i for i, value in enumerate(order)}
+
+    def __call__(self, value):
+        try:
+            return self.rank[value]
+        except KeyError:
+            raise ValueError('{!r} is not in the preferred order {}'.format(value, list(self.rank)))
+
+
+def is_sorted(values):
+    return all([a <= b for a, b in zip(values, values[1:])])
+
+
+class DictOrder:
+    """
+    Orders the keys of a dict, and the values under them as `fields` say.
+
+    Rather than sorting its keys, the dict is rebuilt by picking them in the preferred order.
+    """
+
+    def __init__(self, order, fields=None):
+        self.order = list(order)
+        self.ranking = Ranking(order)
+        self.fields = fields or {}
+
+    def apply(self, value):
+        if not isinstance(value, dict):
+            return value
+        ordered = {key: value[key] for key in self.order if key in value}
+        if len(ordered) != len(value):
+            for key in value:
+                self.ranking(key)
+        for key, order in self.fields.items():
+            if key in ordered:
+                ordered[key] = order.apply(ordered[key])
+        return ordered
+
+    def is_ordered(self, value):
+        """Whether `apply` would leave value as it is, found without building anything."""
+        if not isinstance(value, dict):
+            return True
+        rank = self.ranking.rank
+        last = -1
+        for key in value:
+            position = rank.get(key)
+            if position is None or position < last:
+                return False
+            last = position
+        return all([
+            order.is_ordered(value[key]) for key, order in self.fields.items() if key in value
+        ])
+
+
+class ListOrder:
+    """
+    Sorts a list. Lists of dicts get each dict ordered as `item` says and are sorted by their
+    `key` field, any other list is sorted by value, or by rank when given an `order`. Mappings
+    found instead of a list (ei. `{id: amount}`) are ordered by key.
+    """
+
+    def __init__(self, item=None, key=None, order=None):
+        self.item = item
+        self.key = key
+        self.ranking = Ranking(order) if order is not None else None
+
+    def apply(self, value):
+        if isinstance(value, dict):
+            return dict(sorted(value.items()))
+        if self.item is not None and all([isinstance(item, dict) for item in value]):
+            return sorted([self.item.apply(item) for item in value], key=itemgetter(self.key))
+        return sorted(value, key=self.ranking)
+
+    def is_ordered(self, value):
+        """Whether `apply` would leave value as it is, found without building anything."""
+        try:
+            if isinstance(value, dict):
+                return is_sorted(list(value))
+            if self.item is not None and all([isinstance(item, dict) for item in value]):
+                return (
+                    all([self.item.is_ordered(item) for item in value]) and
+                    is_sorted([item[self.key] for item in value])
+                )
+            return is_sorted(list(map(self.ranking, value)) if self.ranking else value)
+        except (KeyError, TypeError, ValueError):
+            return False
+
+
 class OrderNormalizer(SingleDataAnalyticalNormalizer):
     def analise(self):
         fields = set()
@@ -11,15 +102,18 @@ class OrderNormalizer(SingleDataAnalyticalNormalizer):
             fields.update(model.keys())
         pprint(list(fields))
 
+    @classmethod
+    def field_orders(cls):
+        return {}
+
+    @classmethod
+    def record_order(cls):
+        return DictOrder(cls.preferred_order, cls.field_orders())
+
     def normalize(self):
+        order = self.record_order()
         for i in range(len(self.data)):
-            model = self.data[i]
-            self.data[i] = OrderedDict(
-                sorted(
-                    model.items(),
-                    key=lambda pair: self.preferred_order.index(pair[0])
-                )
-            )
+            self.data[i] = order.apply(self.data[i])
 
 
 class ShipsOrderNormalizer(OrderNormalizer):
@@ -108,41 +202,13 @@ class PilotsOrderNormalizer(OrderNormalizer):
         'name',
     ]
 
-    def normalize(self):
-        super().normalize()
-
-        for model in self.data:
-            if isinstance(model['ship'], dict):
-                model['ship'] = OrderedDict(
-                    sorted(
-                        model['ship'].items(),
-                        key=lambda pair: self.ship_order.index(pair[0])
-                    )
-                )
-
-            if 'ship_override' in model:
-                model['ship_override'] = OrderedDict(
-                    sorted(
-                        model['ship_override'].items(),
-                        key=lambda pair: self.ship_override_order.index(pair[0])
-                    )
-                )
-
-            if 'conditions' in model:
-                if all([isinstance(fk, dict) for fk in model['conditions']]):
-                    for i in range(len(model['conditions'])):
-                        model['conditions'][i] = OrderedDict(
-                            sorted(
-                                model['conditions'][i].items(),
-                                key=lambda pair: self.conditions_order.index(pair[0])
-                            )
-                        )
-                    model['conditions'] = sorted(
-                        model['conditions'],
-                        key=lambda fk: fk['condition_id']
-                    )
-                else:
-                    model['conditions'].sort()
+    @classmethod
+    def field_orders(cls):
+        return {
+            'ship': DictOrder(cls.ship_order),
+            'ship_override': DictOrder(cls.ship_override_order),
+            'conditions': ListOrder(DictOrder(cls.conditions_order), 'condition_id'),
+        }
 
 
 class SourcesOrderNormalizer(OrderNormalizer):
@@ -191,99 +257,16 @@ class SourcesOrderNormalizer(OrderNormalizer):
         'name',
     ]
 
-    def normalize(self):
-        super().normalize()
-
-        for model in self.data:
-            for i in range(len(model['contents'])):
-                model['contents'] = OrderedDict(
-                    sorted(
-                        model['contents'].items(),
-                        key=lambda pair: self.contents_order.index(pair[0])
-                    )
-                )
-
-            if 'conditions' in model['contents']:
-                if isinstance(model['contents']['conditions'], list):
-                    for i in range(len(model['contents']['conditions'])):
-                        model['contents']['conditions'][i] = OrderedDict(
-                            sorted(
-                                model['contents']['conditions'][i].items(),
-                                key=lambda pair: self.conditions_order.index(pair[0])
-                            )
-                        )
-                    model['contents']['conditions'] = sorted(
-                        model['contents']['conditions'],
-                        key=lambda fk: fk['condition_id']
-                    )
-                else:
-                    alt_conditions_order = sorted(model['contents']['conditions'].keys())
-                    model['contents']['conditions'] = OrderedDict(
-                        sorted(
-                            model['contents']['conditions'].items(),
-                            key=lambda pair: alt_conditions_order.index(pair[0])
-                        )
-                    )
-
-            if 'ships' in model['contents']:
-                if all([isinstance(fk, dict) for fk in model['contents']['ships']]):
-                    for i in range(len(model['contents']['ships'])):
-                        model['contents']['ships'][i] = OrderedDict(
-                            sorted(
-                                model['contents']['ships'][i].items(),
-                                key=lambda pair: self.ships_order.index(pair[0])
-                            )
-                        )
-                    model['contents']['ships'] = sorted(
-                        model['contents']['ships'],
-                        key=lambda fk: fk['ship_id']
-                    )
-                else:
-                    model['contents']['ships'].sort()
-
-            if 'upgrades' in model['contents']:
-                if isinstance(model['contents']['upgrades'], list):
-                    for i in range(len(model['contents']['upgrades'])):
-                        model['contents']['upgrades'][i] = OrderedDict(
-                            sorted(
-                                model['contents']['upgrades'][i].items(),
-                                key=lambda pair: self.upgrades_order.index(pair[0])
-                            )
-                        )
-                    model['contents']['upgrades'] = sorted(
-                        model['contents']['upgrades'],
-                        key=lambda fk: fk['upgrade_id']
-                    )
-                else:
-                    alt_upgrades_order = sorted(model['contents']['upgrades'].keys())
-                    model['contents']['upgrades'] = OrderedDict(
-                        sorted(
-                            model['contents']['upgrades'].items(),
-                            key=lambda pair: alt_upgrades_order.index(pair[0])
-                        )
-                    )
-
-            if 'pilots' in model['contents']:
-                if isinstance(model['contents']['pilots'], list):
-                    for i in range(len(model['contents']['pilots'])):
-                        model['contents']['pilots'][i] = OrderedDict(
-                            sorted(
-                                model['contents']['pilots'][i].items(),
-                                key=lambda pair: self.pilots_order.index(pair[0])
-                            )
-                        )
-                    model['contents']['pilots'] = sorted(
-                        model['contents']['pilots'],
-                        key=lambda fk: fk['pilot_id']
-                    )
-                else:
-                    alt_pilots_order = sorted(model['contents']['pilots'].keys())
-                    model['contents']['pilots'] = OrderedDict(
-                        sorted(
-                            model['contents']['pilots'].items(),
-                            key=lambda pair: alt_pilots_order.index(pair[0])
-                        )
-                    )
+    @classmethod
+    def field_orders(cls):
+        return {
+            'contents': DictOrder(cls.contents_order, {
+                'ships': ListOrder(DictOrder(cls.ships_order), 'ship_id'),
+                'pilots': ListOrder(DictOrder(cls.pilots_order), 'pilot_id'),
+                'upgrades': ListOrder(DictOrder(cls.upgrades_order), 'upgrade_id'),
+                'conditions': ListOrder(DictOrder(cls.conditions_order), 'condition_id'),
+            }),
+        }
 
 
 class UpgradesOrderNormalizer(OrderNormalizer):
@@ -333,90 +316,32 @@ class UpgradesOrderNormalizer(OrderNormalizer):
         'name'
     ]
 
-    def normalize(self):
-        super().normalize()
-        for model in self.data:
-            if 'size' in model:
-                model['size'] = sorted(
-                    model['size'],
-                    key=lambda s: self.sizes_order.index(s)
-                )
-            if 'sizes' in model:
-                model['sizes'] = sorted(
-                    model['sizes'],
-                    key=lambda s: self.sizes_order.index(s)
-                )
-
-            if 'ship' in model:
-                if all([isinstance(fk, dict) for fk in model['ship']]):
-                    for i in range(len(model['ship'])):
-                        model['ship'][i] = OrderedDict(
-                            sorted(
-                                model['ship'][i].items(),
-                                key=lambda pair: self.ships_order.index(pair[0])
-                            )
-                        )
-                    model['ship'] = sorted(
-                        model['ship'],
-                        key=lambda fk: fk['ship_id']
-                    )
-                else:
-                    model['ship'].sort()
-
-            if 'ships' in model:
-                if all([isinstance(fk, dict) for fk in model['ships']]):
-                    for i in range(len(model['ships'])):
-                        model['ships'][i] = OrderedDict(
-                            sorted(
-                                model['ships'][i].items(),
-                                key=lambda pair: self.ships_order.index(pair[0])
-                            )
-                        )
-                    model['ships'] = sorted(
-                        model['ships'],
-                        key=lambda fk: fk['ship_id']
-                    )
-                else:
-                    model['ships'].sort()
-
-            if 'conditions' in model:
-                if all([isinstance(fk, dict) for fk in model['conditions']]):
-                    for i in range(len(model['conditions'])):
-                        model['conditions'][i] = OrderedDict(
-                            sorted(
-                                model['conditions'][i].items(),
-                                key=lambda pair: self.conditions_order.index(pair[0])
-                            )
-                        )
-                    model['conditions'] = sorted(
-                        model['conditions'],
-                        key=lambda fk: fk['condition_id']
-                    )
-                else:
-                    model['conditions'].sort()
-
-            if 'grants' in model:
-                for i in range(len(model['grants'])):
-                    model['grants'][i] = OrderedDict(
-                        sorted(
-                            model['grants'][i].items(),
-                            key=lambda pair: self.grants_order.index(pair[0])
-                        )
-                    )
-                model['grants'] = sorted(
-                    model['grants'],
-                    key=lambda fk: fk['type']
-                )
-
-
-def set_preferred_order():
-    ShipsOrderNormalizer()
-    ConditionsOrderNormalizer()
-    DamageDeckCoreOrderNormalizer()
-    DamageDeckCoreTfaOrderNormalizer()
-    PilotsOrderNormalizer()
-    SourcesOrderNormalizer()
-    UpgradesOrderNormalizer()
+    @classmethod
+    def field_orders(cls):
+        return {
+            'size': ListOrder(order=cls.sizes_order),
+            'sizes': ListOrder(order=cls.sizes_order),
+            'ship': ListOrder(DictOrder(cls.ships_order), 'ship_id'),
+            'ships': ListOrder(DictOrder(cls.ships_order), 'ship_id'),
+            'conditions': ListOrder(DictOrder(cls.conditions_order), 'condition_id'),
+            'grants': ListOrder(DictOrder(cls.grants_order), 'type'),
+        }
+
+
+preferred_order_normalizers = [
+    ShipsOrderNormalizer,
+    ConditionsOrderNormalizer,
+    DamageDeckCoreOrderNormalizer,
+    DamageDeckCoreTfaOrderNormalizer,
+    PilotsOrderNormalizer,
+    SourcesOrderNormalizer,
+    UpgradesOrderNormalizer,
+]
+
+
+def set_preferred_order(session=None):
+    for normalizer in preferred_order_normalizers:
+        normalizer(session).run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+import os
+import json
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.normalize.base import XWingDataBaseMixin, content_hash
+
+
+class Manifest:
+    """
+    Content hashes of the data files and code versions of the tools as of the last run.
+
+    A file whose hash still matches was left untouched since then, so it already is the output
+    of a full run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.tools = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as file_object:
+                manifest = json.load(file_object)
+            self.files = manifest.get('files', {})
+            self.tools = manifest.get('tools', {})
+
+    @classmethod
+    def for_root(cls, root):
+        return cls(os.path.join(
+            XWingDataBaseMixin.cache_root,
+            content_hash(os.path.abspath(root))[:16],
+            'manifest.json'
+        ))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w') as file_object:
+            json.dump(
+                {'files': self.files, 'tools': self.tools}, file_object, indent=2, sort_keys=True
+            )
+
+
+class Pipeline:
+    """
+    Runs tools one after the other over a shared session.
+
+    When given a manifest, tools whose inputs and code are unchanged since the last run are
+    skipped. An input counts as changed when the file on disk differs from the manifest or when
+    a tool that ran earlier in this run stored it.
+    """
+
+    def __init__(self, session, manifest=None):
+        self.session = session
+        self.manifest = manifest
+        self.dirty = set()
+        self.skipped = []
+        self.measurement = instrumentation.report.start('DataSession', 'session')
+
+    def is_dirty(self, source_key):
+        if source_key not in self.dirty:
+            if self.manifest.files.get(source_key) != self.session.file_hash(source_key):
+                self.dirty.add(source_key)
+        return source_key in self.dirty
+
+    def is_up_to_date(self, tool):
+        if self.manifest is None:
+            return False
+        if self.manifest.tools.get(tool.__name__) != tool.code_version():
+            return False
+        return not any([self.is_dirty(key) for key in tool.input_keys()])
+
+    def run_tool(self, tool):
+        if self.is_up_to_date(tool):
+            self.skipped.append(tool.__name__)
+            print('\n{} skipped, inputs unchanged since last run'.format(tool.__name__))
+            return
+        tool(self.session).run()
+        self.dirty.update(tool.output_keys())
+
+    def prefetch(self, tools):
+        """Loads the inputs of every tool that is going to run, all at once."""
+        with self.measurement.stage('load'):
+            self.session.load_many(sorted({
+                key for tool in tools if not self.is_up_to_date(tool) for key in tool.input_keys()
+            }))
+
+    def run(self, tools):
+        self.prefetch(tools)
+        for tool in tools:
+            self.run_tool(tool)
+        self.finish(tools)
+
+    def finish(self, tools):
+        with self.measurement.stage('save'):
+            self.session.save()
+
+        if self.manifest is not None and not self.session.dry_run:
+            for tool in tools:
+                self.manifest.tools[tool.__name__] = tool.code_version()
+                for key in tool.input_keys():
+                    self.manifest.files[key] = self.session.file_hash(key)
+            self.manifest.save()
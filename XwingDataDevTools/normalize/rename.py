@@ -29,4 +29,4 @@ class FieldRenamer(MultipleDataNormalizer):
 
 
 if __name__ == '__main__':
-    FieldRenamer()
+    FieldRenamer().run()
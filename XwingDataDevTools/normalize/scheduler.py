@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.normalize.base import DataSession
+from XwingDataDevTools.normalize.pipeline import Pipeline
+
+
+def run_in_worker(tool, root, collections, trace_memory):
+    report = instrumentation.new_report(trace_memory)
+    session = DataSession(root)
+    session.collections.update(collections)
+    tool(session).run()
+    return (
+        {source_key: session.collections[source_key] for source_key in session.changed},
+        [measurement.to_dict() for measurement in report.measurements],
+    )
+
+
+class Scheduler(Pipeline):
+    """
+    Runs tools concurrently in a process pool, as their declared keys allow.
+
+    A tool depends on every earlier tool that writes a collection it reads or writes, or that
+    reads a collection it writes. Anything else runs side by side in worker processes, which get
+    the inputs already held by the session, load any other input they touch from disk and hand
+    back the collections they stored. Tools that can't run in a worker run in this process once
+    their dependencies are done.
+    """
+
+    def __init__(self, session, manifest=None, jobs=None):
+        super().__init__(session, manifest)
+        self.jobs = jobs or os.cpu_count()
+
+    @staticmethod
+    def conflicts(tool, other):
+        reads, writes = set(tool.input_keys()), set(tool.output_keys())
+        other_reads, other_writes = set(other.input_keys()), set(other.output_keys())
+        return bool(writes & (other_reads | other_writes) or reads & other_writes)
+
+    def dependencies(self, tools):
+        return [
+            {j for j in range(i) if self.conflicts(tools[j], tools[i])}
+            for i in range(len(tools))
+        ]
+
+    def submit(self, executor, tool):
+        # Collections not loaded here are as they are on disk, the worker loads those it needs.
+        collections = {
+            key: self.session.collections[key] for key in tool.input_keys()
+            if key in self.session.collections
+        }
+        return executor.submit(
+            run_in_worker, tool, self.session.root, collections,
+            instrumentation.report.trace_memory
+        )
+
+    def run(self, tools):
+        if self.jobs == 1:
+            return super().run(tools)
+
+        self.prefetch(tools)
+        dependencies = self.dependencies(tools)
+        started, done = set(), set()
+        running = {}
+
+        with ProcessPoolExecutor(self.jobs) as executor:
+            while len(done) < len(tools):
+                progressed = False
+                for index in range(len(tools)):
+                    if index in started or not dependencies[index] <= done:
+                        continue
+                    tool = tools[index]
+                    started.add(index)
+                    if tool.parallel and not self.is_up_to_date(tool):
+                        running[self.submit(executor, tool)] = index
+                    else:
+                        self.run_tool(tool)
+                        done.add(index)
+                        progressed = True
+
+                if progressed:
+                    continue
+                if not running:
+                    raise RuntimeError('Tools left that can never run, check their keys!!')
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    collections, measurements = future.result()
+                    for source_key, data in collections.items():
+                        self.session.store(source_key, data)
+                    instrumentation.report.measurements.extend(
+                        [instrumentation.Measurement.from_dict(m) for m in measurements]
+                    )
+                    self.dirty.update(tools[index].output_keys())
+                    done.add(index)
+
+        self.finish(tools)
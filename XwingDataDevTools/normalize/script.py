@@ -1,38 +1,63 @@
+import os
+
+from XwingDataDevTools import instrumentation
 from XwingDataDevTools.normalize import (
-    foreign_keys, maneuvers, ids, custom_indentation, order, rename, gather, trivial
+    foreign_keys, maneuvers, ids, order, rename, gather, trivial
 )
+from XwingDataDevTools.normalize.base import DataSession, XWingDataBaseMixin
+from XwingDataDevTools.normalize.pipeline import Manifest
+from XwingDataDevTools.normalize.scheduler import Scheduler
 
 
-def main(order_fields=False):
-    ids.AddShipsIds()
+def steps(order_fields=False, rename_fields=True):
+    tools = [
+        ids.AddShipsIds,
+    ]
 
-    rename.FieldRenamer()
+    if rename_fields:
+        tools.append(rename.FieldRenamer)
 
-    maneuvers.HugeShipManeuverNormalizer()
-    maneuvers.LargeShipManeuverNormalizer()
-    maneuvers.SmallShipManeuverNormalizer()
+    tools.extend([
+        maneuvers.ManeuverNormalizer,
 
-    foreign_keys.SourceShipsForeignKeyNormalization()
-    foreign_keys.SourceUpgradesForeignKeyNormalization()
-    foreign_keys.SourceConditionsForeignKeyNormalization()
-    foreign_keys.SourcePilotsForeignKeyNormalization()
+        foreign_keys.SourceShipsForeignKeyNormalization,
+        foreign_keys.SourceUpgradesForeignKeyNormalization,
+        foreign_keys.SourceConditionsForeignKeyNormalization,
+        foreign_keys.SourcePilotsForeignKeyNormalization,
 
-    foreign_keys.UpgradeConditionsForeignKeyNormalization()
-    foreign_keys.UpgradeShipForeignKeyNormalization()
-    foreign_keys.UpgradeShipsForeignKeyNormalization()  # In case it has been renamed
+        foreign_keys.UpgradeConditionsForeignKeyNormalization,
+        foreign_keys.UpgradeShipForeignKeyNormalization,
+        foreign_keys.UpgradeShipsForeignKeyNormalization,  # In case it has been renamed
 
-    foreign_keys.PilotConditionsForeignKeyNormalization()
-    foreign_keys.PilotShipForeignKeyNormalization()
+        foreign_keys.PilotConditionsForeignKeyNormalization,
+        foreign_keys.PilotShipForeignKeyNormalization,
 
-    gather.AddMissingAnnouncedDate()
-    gather.AddMissingReleaseDate()
+        gather.AddMissingAnnouncedDate,
+        gather.AddMissingReleaseDate,
 
-    trivial.TextToMarkdown()
+        trivial.TextToMarkdown,
+    ])
 
     if order_fields:
-        order.set_preferred_order()
+        tools.extend(order.preferred_order_normalizers)
+
+    return tools
+
+
+def run(root=None, order_fields=False, incremental=False, dry_run=False, jobs=None,
+        rename_fields=True):
+    session = DataSession(root, dry_run=dry_run)
+    manifest = Manifest.for_root(session.root) if incremental else None
+    Scheduler(session, manifest, jobs).run(steps(order_fields, rename_fields))
+
 
-    custom_indentation.same_line_indent()
+def main(order_fields=False, incremental=False, dry_run=False, jobs=None, report_path=None,
+         trace_memory=False, root=None):
+    report = instrumentation.new_report(trace_memory)
+    run(root, order_fields, incremental, dry_run, jobs)
+    report.save(
+        report_path or os.path.join(XWingDataBaseMixin.cache_root, 'reports', 'normalize.json')
+    )
 
 
 if __name__ == '__main__':
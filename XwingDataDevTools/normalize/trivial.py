@@ -2,6 +2,7 @@ import datetime
 import re
 from pprint import pprint
 
+from XwingDataDevTools.card_text import html_to_markdown
 from XwingDataDevTools.normalize.base import (
     MultipleDataAnalyticalNormalizer, MultipleDataNormalizer,
     MultipleDataAnalyzer, SingleDataAnalyzer
@@ -160,23 +161,15 @@ class TextToMarkdown(MultipleDataNormalizer):
             for model in self.data[key]:
                 for f in ['text', 'effect']:
                     if f in model:
-                        model[f] = model[f].replace('<strong>', '**')
-                        model[f] = model[f].replace('</strong>', '**')
-                        model[f] = model[f].replace('<b>', '**')
-                        model[f] = model[f].replace('</b>', '**')
-                        model[f] = model[f].replace('<br />', '\n')
-                        model[f] = model[f].replace('<br/>', '\n')
-                        model[f] = model[f].replace('<em>', '*')
-                        model[f] = model[f].replace('</em>', '*')
-                        model[f] = model[f].replace('<i>', '*')
-                        model[f] = model[f].replace('</i>', '*')
+                        model[f] = html_to_markdown(model[f])
+
 
 if __name__ == '__main__':
     pass
-    RangeToString()
-    AttackToInt()
-    EnergyToInt()
-    IconList()
-    ShipNames()
-    ShipsByReleaseDate()
+    RangeToString().run()
+    AttackToInt().run()
+    EnergyToInt().run()
+    IconList().run()
+    ShipNames().run()
+    ShipsByReleaseDate().run()
 
@@ -0,0 +1,86 @@
+import os
+import time
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.normalize.base import DataSession
+from XwingDataDevTools.normalize.pipeline import Manifest
+from XwingDataDevTools.normalize.scheduler import Scheduler
+from XwingDataDevTools.normalize.script import steps
+
+
+class Watcher(Scheduler):
+    """
+    Keeps the collections of a session in memory and runs the tools again as their files change.
+
+    Data files are polled for changes in size or mtime, changed ones are loaded again. The
+    manifest, brought up to date by every run, tells which tools need to run: those reading a
+    file whose content changed or one stored by a tool that ran before them. As always, only
+    files whose content changes are written.
+    """
+
+    def __init__(self, session, tools, manifest=None, jobs=None, interval=1.0):
+        super().__init__(session, manifest or Manifest.for_root(session.root), jobs)
+        self.tools = tools
+        self.interval = interval
+        self.stats = {}
+
+    def source_keys(self):
+        return sorted({
+            key for tool in self.tools for key in tool.input_keys() + tool.output_keys()
+        })
+
+    def stat(self, source_key):
+        try:
+            stat = os.stat(self.session.path(source_key))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def changes(self):
+        return [key for key in self.source_keys() if self.stat(key) != self.stats.get(key)]
+
+    def cycle(self):
+        instrumentation.new_report(instrumentation.report.trace_memory)
+        self.measurement = instrumentation.report.start('DataSession', 'session')
+        self.dirty = set()
+        self.skipped = []
+        written = len(self.session.written)
+        start = time.perf_counter()
+
+        # Taken before running, so changes made meanwhile are picked up by the next poll.
+        stats = {key: self.stat(key) for key in self.source_keys()}
+        self.run(self.tools)
+        for source_key in self.session.written[written:]:
+            stats[source_key] = self.stat(source_key)
+        self.stats = stats
+
+        print('\n{} tools run, {} skipped, {} files written in {:.2f}s'.format(
+            len(self.tools) - len(self.skipped),
+            len(self.skipped),
+            len(self.session.written) - written,
+            time.perf_counter() - start,
+        ))
+
+    def watch(self):
+        self.cycle()
+        print('Watching {} for changes, press Ctrl+C to stop'.format(self.session.root))
+        try:
+            while True:
+                time.sleep(self.interval)
+                changes = self.changes()
+                if not changes:
+                    continue
+                print('\nChanged: {}'.format(', '.join(changes)))
+                for source_key in changes:
+                    self.session.forget(source_key)
+                self.cycle()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(order_fields=False, interval=1.0, jobs=None, root=None):
+    Watcher(DataSession(root), steps(order_fields), jobs=jobs, interval=interval).watch()
+
+
+if __name__ == '__main__':
+    main()
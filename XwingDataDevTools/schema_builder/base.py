@@ -1,7 +1,82 @@
-import json
-from collections import OrderedDict
+import os
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
 
+from XwingDataDevTools import codec, instrumentation
+from XwingDataDevTools.normalize.base import XWingDataBaseMixin
+from XwingDataDevTools.snapshots import SnapshotCache
+
+
+class DataProfile:
+    """
+    What the records of a data file hold, found in a single pass over them.
+
+    For every field it keeps how many records have it and the JS types of its values, along with
+    the keys of every object found under fields, or in lists under them. Every value, or every item
+    of list values, is counted for the fields in `value_fields` only, as those are the ones enums
+    are made of. Fields and nested keys are kept in the order they are first found.
+    """
+
+    def __init__(self, records, js_attr, value_fields=()):
+        self.records = 0
+        self.first_keys = []
+        self.presence = {}
+        self.types = {}
+        self.values = {}
+        self.nested_keys = {}
+        self.item_keys = {}
+
+        for record in records:
+            if not self.records:
+                self.first_keys = list(record.keys())
+            self.records += 1
+            for attr, value in record.items():
+                if attr in self.presence:
+                    self.presence[attr] += 1
+                else:
+                    self.presence[attr] = 1
+                    self.types[attr] = set()
+
+                attr_type = js_attr(value)
+                self.types[attr].add(attr_type)
+
+                if attr_type == 'object':
+                    for key in value:
+                        self.nested_keys.setdefault(key)
+                elif attr_type == 'array':
+                    for item in value:
+                        if isinstance(item, dict):
+                            for key in item:
+                                self.item_keys.setdefault(key)
+
+                if attr in value_fields:
+                    values = self.values.setdefault(attr, Counter())
+                    if value.__class__ == list:
+                        values.update(value)
+                    else:
+                        values[value] += 1
+
+    def required(self, not_required=()):
+        """Fields of the first record found in every record."""
+        return [
+            attr for attr in self.first_keys
+            if attr not in not_required and self.presence[attr] == self.records
+        ]
+
+    def fields_order(self):
+        """
+        Fields in the order first found, followed by the keys of the objects under them and then
+        by those of the objects in lists under them (ei. `conditions[*].condition_id`).
+        """
+        order = list(self.presence)
+        order.extend([key for key in self.nested_keys if key not in self.presence])
+        order.extend([
+            key for key in self.item_keys
+            if key not in self.presence and key not in self.nested_keys
+        ])
+        return order
+
 
 class SchemaBuilder:
     data_files_root = '/home/lvisintini/src/xwing-data/data/'
@@ -63,7 +138,13 @@ class SchemaBuilder:
         None: 'null',
     }
 
-    def __init__(self):
+    def __init__(self, data_files_root=None, schema_files_root=None):
+        if data_files_root is not None:
+            self.data_files_root = data_files_root
+        if schema_files_root is not None:
+            self.schema_files_root = schema_files_root
+        self.enum_values = {}
+        self.measurement = instrumentation.report.start(self.__class__.__name__, 'schema builder')
         self.build_schema()
         self.properties_order = []
 
@@ -114,10 +195,37 @@ class SchemaBuilder:
         )
         return d
 
+    def enum_schema(self, name):
+        raise NotImplementedError
+
+    def add_enum_values(self, name, values):
+        """
+        Counts values, a single one, a list or a Counter of them, towards the enum of `name`.
+        Enums are only turned into the sorted lists the schema holds once, when saving it.
+        """
+        counter = self.enum_values.setdefault(name, Counter())
+        if values.__class__ == list or isinstance(values, Counter):
+            counter.update(values)
+        else:
+            counter[values] += 1
+
+    def enum_frequencies(self):
+        """How many times each value of every enum was found, most common first."""
+        return {name: counter.most_common() for name, counter in self.enum_values.items()}
+
+    def materialize_enums(self):
+        for name, values in self.enum_values.items():
+            schema = self.enum_schema(name)
+            schema['enum'] = sorted(set(schema['enum']).union(values))
+
     def save_schema(self):
+        self.materialize_enums()
         self.schema = self.apply_preferred_attr_order(self.schema)
-        with open('{}/{}.json'.format(self.schema_files_root, self.target_key), 'w') as file_object:
-            json.dump(self.schema, file_object, indent=2)
+        content = codec.dumps(self.schema, ensure_ascii=True)
+        path = os.path.join(self.schema_files_root, '{}.json'.format(self.target_key))
+        with open(path, 'w') as file_object:
+            file_object.write(content)
+        instrumentation.count('bytes_written', len(content.encode('utf-8')))
 
 
 class XWingSchemaBuilder(SchemaBuilder):
@@ -126,15 +234,21 @@ class XWingSchemaBuilder(SchemaBuilder):
     properties_order_tail = []
     preferred_order_tail = []
     not_required = ['image', ]
+    use_snapshots = True
+    use_interning = True
 
-    def __init__(self, shared_definitions):
-        super().__init__()
+    def __init__(self, shared_definitions, data_files_root=None, schema_files_root=None):
+        super().__init__(data_files_root, schema_files_root)
         self.data = []
-        self.load_data()
+        self.profile = None
+        with self.measurement.stage('load'):
+            self.load_data()
         self.shared_definitions = shared_definitions
-        self.explore_models()
-        self.print_properties()
-        self.save_schema()
+        with self.measurement.stage('analyse'):
+            self.explore_models()
+            self.print_properties()
+        with self.measurement.stage('save'):
+            self.save_schema()
 
     def build_schema(self):
         super().build_schema()
@@ -149,6 +263,9 @@ class XWingSchemaBuilder(SchemaBuilder):
     def properties(self):
         return self.schema['properties']
 
+    def enum_schema(self, name):
+        return self.properties[name]
+
     @property
     def required(self):
         return self.schema['required']
@@ -157,16 +274,32 @@ class XWingSchemaBuilder(SchemaBuilder):
     def required(self, value):
         self.schema['required'] = value
 
+    def load_file(self, source_key):
+        path = os.path.join(self.data_files_root, '{}.js'.format(source_key))
+        if self.use_snapshots:
+            snapshots = SnapshotCache(os.path.join(XWingDataBaseMixin.cache_root, 'snapshots'))
+            data = snapshots.load(path)[1]
+        else:
+            with open(path, 'r') as file_object:
+                content = file_object.read()
+            instrumentation.count('bytes_read', len(content.encode('utf-8')))
+            data = codec.loads(content)
+        if self.use_interning:
+            instrumentation.count('memory_saved', codec.intern_strings(data))
+        return data
+
     def load_data(self):
-        for key in self.source_keys:
-            with open('{}{}.js'.format(self.data_files_root, key), 'r') as file_object:
-                self.data.extend(json.load(file_object, object_pairs_hook=OrderedDict))
+        if len(self.source_keys) > 1:
+            with ThreadPoolExecutor(len(self.source_keys)) as executor:
+                collections = list(executor.map(self.load_file, self.source_keys))
+        else:
+            collections = [self.load_file(key) for key in self.source_keys]
+        for data in collections:
+            self.data.extend(data)
+        instrumentation.count('records', len(self.data))
 
     def gather_required(self):
-        required = [key for key in self.data[0].keys() if key not in self.not_required]
-        for model in self.data:
-            required = [r for r in required if r in model]
-        self.required = required
+        self.required = self.profile.required(self.not_required)
 
     def print_properties(self):
         name = ' '.join(self.target_key.split('-')).capitalize()
@@ -182,6 +315,8 @@ class XWingSchemaBuilder(SchemaBuilder):
                 no_unique_items.extend(self.check_unique_items(new_p, new_d))
         print('No descriptions for:', no_descriptions)
         print('No unique items for:', no_unique_items)
+        print('Enum frequencies:')
+        pprint(self.enum_frequencies())
 
     def check_descriptions(self, p, d):
         no_descriptions = []
@@ -235,56 +370,45 @@ class XWingSchemaBuilder(SchemaBuilder):
                     if isinstance(new_d, dict):
                         self.change_ref_host(new_d)
 
+    def value_fields(self):
+        """Fields whose values make up enums, local to this schema or shared definitions."""
+        fields = {attr for attr, field in self.fields.items() if 'enum' in field}
+        fields.update(self.shared_definitions.definition_mapping)
+        return fields
+
+    def profile_data(self):
+        self.profile = DataProfile(self.data, self.js_attr, self.value_fields())
+
     def gather_definitions(self):
-        for model in self.data:
-            for attr, data in model.items():
-                    self.shared_definitions.add_definition_data(attr, data)
+        for attr, values in self.profile.values.items():
+            self.shared_definitions.add_definition_data(attr, values)
 
     def gather_properties_order(self):
-        for model in self.data:
-            for attr in model.keys():
-                if attr not in self.properties_order:
-                    self.properties_order.append(attr)
-
-        # Workaround for object type properties.
-        for model in self.data:
-            for attr in model.keys():
-                if self.js_attr(model[attr]) == 'object':
-                    for nested_attr in model[attr].keys():
-                        if nested_attr not in self.properties_order:
-                            self.properties_order.append(nested_attr)
-
+        self.properties_order.extend(self.profile.fields_order())
         self.properties_order.extend(self.properties_order_tail)
 
     def explore_models(self):
+        self.profile_data()
         self.gather_required()
         self.gather_definitions()
         self.gather_properties_order()
 
-        for model in self.data:
-            for attr, value in model.items():
-
-                # Load data from field definitions if this is the first time we evaluate this prop
-                if attr not in self.properties:
-                    self.properties[attr] = {'type': []}
-                    for k, v in self.fields.get(attr, {}).items():
-                        self.properties[attr][k] = v
-
-                # Populate types
-                attr_type = self.js_attr(value)
-                if isinstance(self.properties[attr]['type'], list):
-                    if attr_type not in self.properties[attr]['type']:
-                        self.properties[attr]['type'].append(self.js_attr(value))
-                        self.properties[attr]['type'].sort()
-
-                # Handle local enums
-                if 'enum' in self.properties[attr]:
-                    if value.__class__ == list:
-                        self.properties[attr]['enum'].extend(value)
-                    else:
-                        self.properties[attr]['enum'].append(value)
-                    self.properties[attr]['enum'] = list(set(self.properties[attr]['enum']))
-                    self.properties[attr]['enum'].sort()
+        for attr in self.profile.presence:
+            # Load data from field definitions
+            self.properties[attr] = {'type': []}
+            for k, v in self.fields.get(attr, {}).items():
+                self.properties[attr][k] = v
+
+            # Populate types
+            attr_types = self.properties[attr]['type']
+            if isinstance(attr_types, list):
+                new_types = [t for t in sorted(self.profile.types[attr]) if t not in attr_types]
+                if new_types:
+                    self.properties[attr]['type'] = sorted(attr_types + new_types)
+
+            # Handle local enums
+            if 'enum' in self.properties[attr]:
+                self.add_enum_values(attr, self.profile.values[attr])
 
         for attr in self.properties.keys():
             if set(self.properties[attr].keys()).intersection(self.schema_combining_attrs):
@@ -1,7 +1,11 @@
+import os
 import json
 import copy
 from collections import OrderedDict
-from base import XWingSchemaBuilder, SchemaBuilder
+
+from XwingDataDevTools import instrumentation
+from XwingDataDevTools.normalize.base import XWingDataBaseMixin
+from XwingDataDevTools.schema_builder.base import XWingSchemaBuilder, SchemaBuilder
 
 
 class OverrideMixin:
@@ -67,8 +71,8 @@ class SharedDefinitionsBuilder(OverrideMixin, SchemaBuilder):
         }
     }
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, data_files_root=None, schema_files_root=None):
+        super().__init__(data_files_root, schema_files_root)
         self.properties_order = [
             'faction',
             'size',
@@ -107,18 +111,15 @@ class SharedDefinitionsBuilder(OverrideMixin, SchemaBuilder):
     def add_definition_data(self, attr, enum):
         if attr in self.definition_mapping:
             if 'enum' in self.definitions[self.definition_mapping[attr]]:
-                definition_enum = self.definitions[self.definition_mapping[attr]]['enum']
-                if enum.__class__ == list:
-                    definition_enum.extend(enum)
-                else:
-                    definition_enum.append(enum)
-                self.definitions[self.definition_mapping[attr]]['enum'] = list(set(definition_enum))
-                self.definitions[self.definition_mapping[attr]]['enum'].sort()
+                self.add_enum_values(self.definition_mapping[attr], enum)
 
     @property
     def definitions(self):
         return self.schema['definitions']
 
+    def enum_schema(self, name):
+        return self.definitions[name]
+
     def build_schema(self):
         super().build_schema()
         self.schema.update({
@@ -767,15 +768,19 @@ class ShipsBuilder(OverrideMixin, XWingSchemaBuilder):
             ],
         }
 
-    def __init__(self, shared_definitions):
-        self.build_schema()
-        self.properties_order = []
+    def __init__(self, shared_definitions, data_files_root=None, schema_files_root=None):
+        SchemaBuilder.__init__(self, data_files_root, schema_files_root)
         self.data = []
-        self.load_data()
+        self.profile = None
+        with self.measurement.stage('load'):
+            self.load_data()
         self.shared_definitions = shared_definitions
-        self.gather_definitions()
-        self.gather_properties_order()
-        self.save_schema()
+        with self.measurement.stage('analyse'):
+            self.profile_data()
+            self.gather_definitions()
+            self.gather_properties_order()
+        with self.measurement.stage('save'):
+            self.save_schema()
 
 
 class SourcesBuilder(OverrideMixin, XWingSchemaBuilder):
@@ -973,21 +978,36 @@ class ReferenceCardsBuilder(OverrideMixin, XWingSchemaBuilder):
         },
     }
 
-if __name__ == '__main__':
-    sd = SharedDefinitionsBuilder()
-
-    builders = [
-        ShipsBuilder,
-        PilotsBuilder,
-        UpgradesBuilder,
-        SourcesBuilder,
-        DamageDeckBuilder,
-        ConditionsBuilder,
-        ReferenceCardsBuilder,
-    ]
+
+builders = [
+    ShipsBuilder,
+    PilotsBuilder,
+    UpgradesBuilder,
+    SourcesBuilder,
+    DamageDeckBuilder,
+    ConditionsBuilder,
+    ReferenceCardsBuilder,
+]
+
+
+def build(data_files_root=None, schema_files_root=None):
+    sd = SharedDefinitionsBuilder(data_files_root, schema_files_root)
 
     for builder in builders:
-        builder(sd)
+        builder(sd, data_files_root, schema_files_root)
+
+    with sd.measurement.stage('save'):
+        sd.save_schema()
+    #sd.print_schema()
+
 
-    sd.save_schema()
-    #sd.print_schema()
\ No newline at end of file
+def main(report_path=None, trace_memory=False, data_files_root=None, schema_files_root=None):
+    report = instrumentation.new_report(trace_memory)
+    build(data_files_root, schema_files_root)
+    report.save(
+        report_path or os.path.join(XWingDataBaseMixin.cache_root, 'reports', 'schema.json')
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+
+from XwingDataDevTools import codec, instrumentation
+
+
+class SnapshotCache:
+    """
+    Parsed data files pickled to disk, so a file is only parsed again once it changes.
+
+    A snapshot holds a header with the path, size, mtime and content hash of the file it was
+    taken from, followed by the parsed data. It's used as long as the size and mtime of the file
+    still match, or if they don't, as long as its content still hashes the same (ei. after a
+    checkout). Snapshots are touched when used and the least recently used ones are evicted once
+    they take more than `max_size` bytes.
+
+    Several processes may share a cache, any file in it can go away at any time. Snapshots
+    being written count towards the size too, those left behind by a process that died while
+    writing are removed once they are `stale_after` seconds old.
+    """
+    max_size = 256 * 1024 * 1024
+    stale_after = 60 * 60
+
+    def __init__(self, root, max_size=None):
+        self.root = root
+        if max_size is not None:
+            self.max_size = max_size
+
+    def snapshot_path(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, '{}.pickle'.format(name))
+
+    @staticmethod
+    def stat(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def read_header(self, path):
+        try:
+            with open(self.snapshot_path(path), 'rb') as file_object:
+                header = pickle.load(file_object)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if header.get('path') != os.path.abspath(path):
+            return None
+        return header
+
+    def read_data(self, path):
+        snapshot_path = self.snapshot_path(path)
+        with open(snapshot_path, 'rb') as file_object:
+            pickle.load(file_object)
+            data = pickle.load(file_object)
+        os.utime(snapshot_path)
+        instrumentation.count('bytes_read', os.path.getsize(snapshot_path))
+        return data
+
+    def file_hash(self, path):
+        """Content hash of the file, if a snapshot of it as it's now on disk exists."""
+        header = self.read_header(path)
+        if header and (header['size'], header['mtime']) == self.stat(path):
+            return header['hash']
+        return None
+
+    def load(self, path):
+        """Returns the content hash and the parsed data of the JSON file at path."""
+        header = self.read_header(path)
+        stat = self.stat(path)
+        if header and (header['size'], header['mtime']) == stat:
+            try:
+                return header['hash'], self.read_data(path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                header = None  # Evicted or replaced meanwhile.
+
+        with open(path, 'r') as file_object:
+            content = file_object.read()
+        instrumentation.count('bytes_read', len(content.encode('utf-8')))
+        file_hash = codec.content_hash(content)
+
+        data = None
+        if header and header['hash'] == file_hash:
+            try:
+                data = self.read_data(path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+        if data is None:
+            data = codec.loads(content)
+        self.store(path, stat, file_hash, data)
+        return file_hash, data
+
+    def store(self, path, stat, file_hash, data):
+        header = {
+            'path': os.path.abspath(path), 'size': stat[0], 'mtime': stat[1], 'hash': file_hash
+        }
+        os.makedirs(self.root, exist_ok=True)
+        # Written aside and moved in place, so concurrent runs never read half a snapshot.
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file_object:
+                pickle.dump(header, file_object, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, file_object, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path(path))
+        except BaseException:
+            remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        snapshots = []
+        total_size = 0
+        stale = time.time_ns() - self.stale_after * 10 ** 9
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(('.pickle', '.tmp')):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.pickle'):
+                snapshots.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            elif stat.st_mtime_ns < stale:
+                remove(entry.path)
+                continue
+            total_size += stat.st_size
+
+        for _, size, snapshot_path in sorted(snapshots):
+            if total_size <= self.max_size:
+                break
+            remove(snapshot_path)
+            total_size -= size
+
+    def clear(self):
+        if os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                if entry.name.endswith('.pickle'):
+                    remove(entry.path)
+
+
+def remove(path):
+    """Removes a file unless it's gone already, ei. removed by another process."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
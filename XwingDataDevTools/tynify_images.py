@@ -5,8 +5,8 @@ tinify.key = "ztlmPV5XG4sib4jGK5LYWX7X25hVhKhS"
 ASSETS_DIR = '/home/lvisintini/src/xwing-data/images/'
 
 
-def main():
-    for dir_path, _, file_names in os.walk(ASSETS_DIR):
+def main(assets_dir=ASSETS_DIR):
+    for dir_path, _, file_names in os.walk(assets_dir):
         for f in file_names:
             abs_path = os.path.join(dir_path, f)
             print(abs_path)